@@ -0,0 +1,254 @@
+"""Benchmark the whool build backend hooks on synthetic addons.
+
+Run the benchmark and store the results::
+
+    python benchmarks/bench_build.py run --output results.json
+
+Compare two result files, for instance produced with two whool versions::
+
+    python benchmarks/bench_build.py compare before.json after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+from whool import buildapi
+from whool.version import version as whool_version
+
+HOOKS = (
+    "prepare_metadata_for_build_wheel",
+    "build_wheel",
+    "build_sdist",
+    "build_editable",
+)
+
+
+def _git(args: List[str], cwd: Path) -> None:
+    subprocess.check_call(
+        ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def make_addon(
+    addon_dir: Path,
+    files: int,
+    data_size: int,
+    static_size: int,
+    history: int,
+) -> None:
+    """Create a git controlled addon with python, XML data and static files.
+
+    files is the number of files of each kind, data_size and static_size the total
+    size in bytes of the XML data and of the (incompressible) static files, and
+    history the number of commits after the initial one.
+    """
+    rnd = random.Random(0)
+    addon_dir.mkdir(parents=True)
+    addon_dir.joinpath("__manifest__.py").write_text(
+        "{'name': 'Bench', 'version': '16.0.1.0.0', 'depends': ['base', 'mail']}"
+    )
+    addon_dir.joinpath("__init__.py").write_text("from . import models\n")
+    addon_dir.joinpath("pyproject.toml").write_text(
+        '[build-system]\nrequires = ["whool"]\nbuild-backend = "whool.buildapi"\n'
+    )
+    addon_dir.joinpath("README.rst").write_text("Bench\n=====\n\nA benchmark addon.\n")
+    models_dir = addon_dir / "models"
+    data_dir = addon_dir / "data"
+    static_dir = addon_dir / "static" / "src"
+    for d in (models_dir, data_dir, static_dir):
+        d.mkdir(parents=True)
+    models_dir.joinpath("__init__.py").write_text(
+        "".join(f"from . import model{i}\n" for i in range(files))
+    )
+    record = '  <record id="r{}" model="res.partner"><field name="name">{}</field>'
+    for i in range(files):
+        models_dir.joinpath(f"model{i}.py").write_text(
+            f"from odoo import models\n\n\nclass Model{i}(models.Model):\n"
+            f"    _name = 'bench.model{i}'\n"
+        )
+        lines = ["<odoo>"]
+        size = 0
+        while size < data_size // max(files, 1):
+            line = record.format(size, rnd.random()) + "</record>"
+            lines.append(line)
+            size += len(line)
+        lines.append("</odoo>\n")
+        data_dir.joinpath(f"data{i}.xml").write_text("\n".join(lines))
+        static_dir.joinpath(f"asset{i}.bin").write_bytes(
+            os.urandom(static_size // max(files, 1))
+        )
+    _git(["init", "-q"], addon_dir)
+    _git(["add", "."], addon_dir)
+    _git(["commit", "-q", "-m", "initial commit"], addon_dir)
+    for i in range(history):
+        models_dir.joinpath("model0.py").write_text(f"# change {i}\n")
+        _git(["commit", "-q", "-am", f"change {i}"], addon_dir)
+
+
+@contextmanager
+def _cwd(path: Path) -> Iterator[None]:
+    old_cwd = Path.cwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(old_cwd)
+
+
+def _measure(func: Callable[[], Any], repeat: int) -> List[float]:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _measure_import(repeat: int) -> List[float]:
+    # each PEP 517 hook runs in a fresh process, which pays this startup cost
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, "-c", "import whool.buildapi"])
+        with_import = time.perf_counter() - start
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, "-c", "pass"])
+        durations.append(with_import - (time.perf_counter() - start))
+    return durations
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    if not args.cache:
+        os.environ["WHOOL_NO_CACHE"] = "1"
+    results: Dict[str, Any] = {
+        "whool_version": whool_version,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "cache": args.cache,
+        "addon": {
+            "files": args.files,
+            "data_size": args.data_size,
+            "static_size": args.static_size,
+            "history": args.history,
+        },
+        "hooks": {},
+    }
+    import_durations = _measure_import(args.repeat)
+    results["import"] = {
+        "durations": import_durations,
+        "median": statistics.median(import_durations),
+    }
+    tmp_dir = Path(tempfile.mkdtemp(prefix="whool-bench-"))
+    try:
+        addon_dir = tmp_dir / "bench_addon"
+        make_addon(
+            addon_dir, args.files, args.data_size, args.static_size, args.history
+        )
+        out_dir = tmp_dir / "out"
+        for hook in HOOKS:
+            if args.hooks and hook not in args.hooks:
+                continue
+
+            def _call(hook: str = hook) -> None:
+                if out_dir.exists():
+                    shutil.rmtree(out_dir)
+                out_dir.mkdir()
+                getattr(buildapi, hook)(str(out_dir))
+
+            with _cwd(addon_dir):
+                durations = _measure(_call, args.repeat)
+            output_size = sum(p.stat().st_size for p in out_dir.rglob("*"))
+            results["hooks"][hook] = {
+                "durations": durations,
+                "median": statistics.median(durations),
+                "min": min(durations),
+                "per_second": 1 / statistics.median(durations),
+                "output_size": output_size,
+            }
+    finally:
+        shutil.rmtree(tmp_dir)
+    return results
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]) -> str:
+    lines = [
+        f"{'hook':<34} {before['whool_version'][:14]:>14} "
+        f"{after['whool_version'][:14]:>14} {'ratio':>7}"
+    ]
+    if "import" in before and "import" in after:
+        b = before["import"]["median"]
+        a = after["import"]["median"]
+        lines.append(
+            f"{'import whool.buildapi':<34} {b * 1000:>12.1f}ms {a * 1000:>12.1f}ms "
+            f"{a / b:>7.2f}"
+        )
+    for hook in HOOKS:
+        if hook not in before["hooks"] or hook not in after["hooks"]:
+            continue
+        b = before["hooks"][hook]["median"]
+        a = after["hooks"][hook]["median"]
+        lines.append(
+            f"{hook:<34} {b * 1000:>12.1f}ms {a * 1000:>12.1f}ms {a / b:>7.2f}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = ap.add_subparsers(dest="cmd", required=True)
+    run_ap = subparsers.add_parser("run", help="Run the benchmark.")
+    run_ap.add_argument("--files", type=int, default=50, help="Files of each kind.")
+    run_ap.add_argument(
+        "--data-size", type=int, default=2_000_000, help="Total XML data bytes."
+    )
+    run_ap.add_argument(
+        "--static-size", type=int, default=5_000_000, help="Total static bytes."
+    )
+    run_ap.add_argument(
+        "--history", type=int, default=20, help="Commits after the initial one."
+    )
+    run_ap.add_argument("--repeat", type=int, default=5, help="Calls per hook.")
+    run_ap.add_argument(
+        "--hook", dest="hooks", action="append", choices=HOOKS, help="Hook to run."
+    )
+    run_ap.add_argument("--cache", action="store_true", help="Enable the whool cache.")
+    run_ap.add_argument("--output", "-o", type=Path, help="JSON results file.")
+    compare_ap = subparsers.add_parser("compare", help="Compare two results.")
+    compare_ap.add_argument("before", type=Path)
+    compare_ap.add_argument("after", type=Path)
+    args = ap.parse_args(argv)
+    if args.cmd == "run":
+        results = run(args)
+        for hook, result in results["hooks"].items():
+            sys.stdout.write(
+                f"{hook:<34} {result['median'] * 1000:>10.1f}ms "
+                f"{result['per_second']:>8.2f}/s\n"
+            )
+        if args.output:
+            args.output.write_text(json.dumps(results, indent=2))
+    else:
+        sys.stdout.write(
+            compare(
+                json.loads(args.before.read_text()),
+                json.loads(args.after.read_text()),
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,2 @@
+Add a `--changed-since` option to `whool build`, to build only the addons that
+changed since a `git` ref or in a range of commits.
@@ -0,0 +1 @@
+Add a `whool build` command to build the distribution packages of many addons in a single process.
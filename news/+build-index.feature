@@ -0,0 +1,2 @@
+Add a `--index` option to `whool build`, to write a PEP 503 simple index of the output
+directory, with PEP 658 metadata files for wheels.
@@ -0,0 +1 @@
+Add a `--jobs` option to `whool build`, to build addons in parallel processes.
@@ -0,0 +1 @@
+Add timing of build phases, with `whool build --profile` and the `WHOOL_TRACE_FILE` environment variable.
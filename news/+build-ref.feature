@@ -0,0 +1 @@
+Add a `--ref` option to `whool build`, to build addons as of a `git` ref.
@@ -0,0 +1,2 @@
+Add `whool build --outdir -`, and the `write_wheel` and `write_sdist` functions, to
+write a wheel or sdist to a stream without writing it to disk.
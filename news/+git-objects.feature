@@ -0,0 +1,2 @@
+Add the `WHOOL_READ_GIT_OBJECTS` environment variable, to read unmodified files from
+the `git` object database instead of the working tree when building.
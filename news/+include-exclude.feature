@@ -0,0 +1,2 @@
+Add the `wheel_include`, `wheel_exclude`, `sdist_include` and `sdist_exclude` options,
+to select the files packaged in wheels and sdists with glob patterns.
@@ -0,0 +1 @@
+Editable installs reuse the `build/__editable__` directory and the editable wheel of the previous install when the metadata has not changed.
@@ -0,0 +1,3 @@
+`whool init` can search addons recursively with `--max-depth`, skip directories with
+`--exclude`, and initialize only the addons containing the files it is given. The
+`whool-init` pre-commit hook now passes the changed files.
@@ -0,0 +1,2 @@
+Import the metadata computation and archive writing modules only when needed, to
+speed up the startup of build backend hooks, notably when metadata is cached.
@@ -0,0 +1 @@
+Cache the metadata computed from the `git` history, so repeated builds of an addon are faster.
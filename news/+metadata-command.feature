@@ -0,0 +1,2 @@
+Add a `whool metadata` command, printing the metadata of one or many addons as JSON
+lines, with a `--no-post-version` option to skip the `git` history walk.
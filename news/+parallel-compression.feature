@@ -0,0 +1,2 @@
+Compress wheels and sdists in several threads, and add the `compression_level` and
+`uncompressed_extensions` options.
@@ -0,0 +1 @@
+`build_wheel` and `build_editable` reuse the metadata prepared by `prepare_metadata_for_build_wheel` when the frontend provides it.
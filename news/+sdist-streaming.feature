@@ -0,0 +1,2 @@
+Stream sdist content directly from the addon directory into the archive, instead of
+copying it to a temporary directory first.
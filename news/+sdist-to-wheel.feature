@@ -0,0 +1,3 @@
+When building a wheel from an sdist, read the metadata from `PKG-INFO` instead of
+computing it from the manifest, so the wheel has the same metadata as the sdist and
+is built faster.
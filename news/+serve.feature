@@ -0,0 +1,2 @@
+Add a `whool serve` command, running a build server that the build backend hooks use
+when the `WHOOL_SERVER_SOCKET` environment variable is set.
@@ -0,0 +1,2 @@
+Add the `WHOOL_EDITABLE_DIR` environment variable, to link all addons installed in
+editable mode in a single shared directory, so they add only one `sys.path` entry.
@@ -0,0 +1 @@
+`whool build` lists the `git` controlled files of a repository only once for all the addons it contains. File names with non-ASCII characters are now correctly handled.
@@ -0,0 +1,2 @@
+Add a `whool stamp` command, that writes the metadata of many addons to an index file
+that builds use instead of the git history when `WHOOL_METADATA_INDEX` is set.
@@ -0,0 +1,3 @@
+Wheels are now reproducible, with timestamps set from `SOURCE_DATE_EPOCH` or to
+1980-01-01. Wheels built from unmodified `git` controlled files are cached and reused.
+Add a `whool cache` command to inspect and prune the cache.
@@ -0,0 +1,3 @@
+Build wheels in-process, streaming files from the addon directory into the archive,
+instead of copying them to a temporary directory and running `wheel pack`. `whool` no
+longer depends on `wheel`.
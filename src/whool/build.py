@@ -0,0 +1,185 @@
+import logging
+import os
+import subprocess
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import IO, Dict, List, Optional, Tuple
+
+from .buildapi import (
+    WhoolException,
+    _build_sdist,
+    _build_wheel,
+    _get_dist_info_files,
+    _get_metadata,
+    _get_sdist_base_name,
+    _get_wheel_name,
+    _write_sdist,
+    _write_wheel,
+)
+from .index import write_index, write_metadata_file
+from .scm import (
+    enable_shared_git_index,
+    git_changed_files,
+    git_checkout_at,
+    shared_git_index,
+)
+from .utils import find_addon_dirs
+
+_logger = logging.getLogger(__name__)
+
+
+class BuildError(WhoolException):
+    def __init__(self, failures: Dict[Path, BaseException]) -> None:
+        super().__init__(f"Failed to build {len(failures)} addon(s)")
+        self.failures = failures
+
+
+def _build_addon(
+    addon_dir: Path, outdir: Path, wheel: bool, sdist: bool, index: bool = False
+) -> List[str]:
+    res = []
+    metadata = _get_metadata(addon_dir)
+    if sdist:
+        res.append(_build_sdist(addon_dir, outdir, metadata))
+    if wheel:
+        wheel_name = _build_wheel(addon_dir, outdir, editable=False, metadata=metadata)
+        if index:
+            # the same METADATA as in the wheel, without reading it back
+            write_metadata_file(
+                outdir / wheel_name, dict(_get_dist_info_files(metadata))["METADATA"]
+            )
+        res.append(wheel_name)
+    return res
+
+
+def _select_changed_addons(dir: Path, addon_dirs: List[Path], since: str) -> List[Path]:
+    try:
+        changed_files = git_changed_files(dir, since)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        raise WhoolException(f"Could not find changes in {dir} since {since}") from e
+    dir = dir.resolve()
+    changed_addon_dirs = []
+    for addon_dir in addon_dirs:
+        if addon_dir == dir:
+            changed = bool(changed_files)
+        else:
+            prefix = addon_dir.relative_to(dir).as_posix() + "/"
+            changed = any(p.startswith(prefix) for p in changed_files)
+        if changed:
+            changed_addon_dirs.append(addon_dir)
+        else:
+            _logger.info("Skipped %s, unchanged since %s", addon_dir.name, since)
+    return changed_addon_dirs
+
+
+def _build_addons(
+    addon_dirs: List[Path],
+    outdir: Path,
+    wheel: bool,
+    sdist: bool,
+    index: bool,
+    jobs: int,
+) -> Tuple[List[str], Dict[Path, BaseException]]:
+    res = []
+    failures: Dict[Path, BaseException] = {}
+    if jobs == 1 or len(addon_dirs) <= 1:
+        with shared_git_index():
+            for addon_dir in addon_dirs:
+                try:
+                    names = _build_addon(addon_dir, outdir, wheel, sdist, index)
+                except Exception as e:
+                    _logger.error("Failed to build %s: %s", addon_dir, e)
+                    failures[addon_dir] = e
+                else:
+                    _logger.info("Built %s", ", ".join(names))
+                    res.extend(names)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=enable_shared_git_index
+        ) as executor:
+            futures: List[Future[List[str]]] = [
+                executor.submit(_build_addon, addon_dir, outdir, wheel, sdist, index)
+                for addon_dir in addon_dirs
+            ]
+            for addon_dir, future in zip(addon_dirs, futures):
+                try:
+                    names = future.result()
+                except Exception as e:
+                    _logger.error("Failed to build %s: %s", addon_dir, e)
+                    failures[addon_dir] = e
+                else:
+                    _logger.info("Built %s", ", ".join(names))
+                    res.extend(names)
+    return res, failures
+
+
+def build(
+    dir: Path,
+    outdir: Path,
+    wheel: bool = True,
+    sdist: bool = True,
+    jobs: int = 1,
+    ref: Optional[str] = None,
+    changed_since: Optional[str] = None,
+    index: bool = False,
+) -> List[str]:
+    """Build distributions for dir if it is an addon, else for all addons in its
+    immediate subdirectories.
+
+    Addons are built in jobs parallel processes (0 means one per CPU). Return the names
+    of the files created in outdir, in addon order. If any addon fails to build, the
+    other addons are still built and BuildError is raised at the end.
+
+    When ref is set, the addons are built as of this git ref, without checking out
+    the rest of the repository.
+
+    When changed_since is set, only the addons with files that changed since this git
+    ref (or in this git range) are built.
+
+    When index is True, a PEP 503 simple repository index of all the distributions
+    in outdir is written in outdir/simple, with PEP 658 metadata files for wheels.
+    """
+    if jobs < 0:
+        raise WhoolException(f"Invalid number of jobs: {jobs}")
+    outdir = outdir.absolute()
+    if ref:
+        try:
+            with git_checkout_at(dir, ref) as ref_dir:
+                return build(
+                    ref_dir, outdir, wheel, sdist, jobs, None, changed_since, index
+                )
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            raise WhoolException(f"Could not check out {dir} at {ref}") from e
+    outdir.mkdir(parents=True, exist_ok=True)
+    addon_dirs = [addon_dir.resolve() for addon_dir in find_addon_dirs(dir)]
+    if changed_since:
+        addon_dirs = _select_changed_addons(dir, addon_dirs, changed_since)
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    res, failures = _build_addons(addon_dirs, outdir, wheel, sdist, index, jobs)
+    if index:
+        write_index(outdir)
+    if failures:
+        raise BuildError(failures)
+    return res
+
+
+def write_wheel(addon_dir: Path, wheel_file: IO[bytes]) -> str:
+    """Write the wheel of addon_dir to wheel_file, and return its file name.
+
+    wheel_file does not need to be seekable, so it can be a pipe or a socket, and
+    nothing is written to disk.
+    """
+    metadata = _get_metadata(addon_dir)
+    _write_wheel(addon_dir, wheel_file, metadata)
+    return _get_wheel_name(metadata)
+
+
+def write_sdist(addon_dir: Path, sdist_file: IO[bytes]) -> str:
+    """Write the sdist of addon_dir to sdist_file, and return its file name.
+
+    Like for write_wheel, sdist_file does not need to be seekable.
+    """
+    metadata = _get_metadata(addon_dir)
+    _write_sdist(addon_dir, sdist_file, metadata)
+    return _get_sdist_base_name(metadata) + ".tar.gz"
@@ -1,25 +1,72 @@
+import fnmatch
+import hashlib
+import json
 import os
 import re
 import shutil
 import subprocess
-import sys
-import tarfile
-import tempfile
+import time
+from contextlib import contextmanager
 from email.generator import Generator
 from email.message import Message
 from email.parser import HeaderParser
+from io import BytesIO, StringIO
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-from manifestoo_core.metadata import (
-    distribution_name_to_addon_name,
-    metadata_from_addon_dir,
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
 )
 
+from .cache import (
+    add_file_to_cache,
+    get_cache_dir,
+    get_cached_file,
+    read_cache,
+    write_cache,
+)
+from .scm import (
+    REGULAR_FILE_MODES,
+    GitBlobs,
+    git_blobs,
+    git_head,
+    git_ls_files,
+    git_modified_files,
+    git_shallow_commits,
+    git_uncommitted,
+)
+from .server import call_server
+from .timing import span
 from .utils import load_pyproject_toml
-from .version import version as whool_version
+
+if TYPE_CHECKING:
+    import tarfile
+
+    from manifestoo_core.metadata import MetadataOptions
+
+    from .wheelfile import WheelWriter
+
+# Each PEP 517 hook runs in a fresh process, so modules that are only needed to
+# compute metadata from scratch or to write archives are imported where they are
+# used, keeping hooks that hit the cache fast to start.
 
 TAG = "py3-none-any"
+# files of the addon directory that metadata is computed from
+METADATA_SOURCE_FILES = (
+    "__manifest__.py",
+    "__openerp__.py",
+    "README.rst",
+    "README.md",
+    "README.txt",
+)
 METADATA_NAME_RE = re.compile(r"^odoo(\d*)-addon-(?P<addon_name>.*)$")
 
 
@@ -35,40 +82,93 @@ class NoScmFound(WhoolException):
     pass
 
 
+class CompressionOptions(NamedTuple):
+    level: Optional[int]
+    uncompressed_extensions: List[str]
+
+
+class FileFilter(NamedTuple):
+    include: Optional[Pattern[str]]
+    exclude: Optional[Pattern[str]]
+
+    def matches(self, path: str) -> bool:
+        """Return True if path, relative to the addon directory, must be packaged.
+
+        A glob pattern matches a file if it matches its path or the path of one of
+        its parent directories.
+        """
+        candidates = [path[:i] for i, c in enumerate(path) if c == "/"] + [path]
+        if self.include and not any(self.include.match(c) for c in candidates):
+            return False
+        if self.exclude and any(self.exclude.match(c) for c in candidates):
+            return False
+        return True
+
+
+def _get_addon_name(metadata: Message) -> str:
+    """Return the addon name of a distribution, like
+    manifestoo_core.metadata.distribution_name_to_addon_name."""
+    mo = METADATA_NAME_RE.match(metadata["Name"])
+    if not mo:
+        raise WhoolException(
+            f"{metadata['Name']} does not look like an Odoo addon package name"
+        )
+    return mo.group("addon_name").replace("-", "_")
+
+
 def _scm_ls_files(addon_dir: Path) -> List[str]:
     try:
-        return (
-            subprocess.check_output(
-                ["git", "ls-files"], universal_newlines=True, cwd=addon_dir
-            )
-            .strip()
-            .split("\n")
-        )
+        return list(git_ls_files(addon_dir))
     except (subprocess.CalledProcessError, FileNotFoundError) as e:
         raise NoScmFound() from e
 
 
-def _copy_to(addon_dir: Path, dst: Path) -> None:
-    if _get_pkg_info_metadata(addon_dir):
-        # if PKG-INFO is present, assume we are in an sdist, copy everything
-        shutil.copytree(addon_dir, dst)
-        return
-    # copy scm controlled files
+def _walk_files(addon_dir: Path, outdir: Optional[Path] = None) -> List[str]:
+    res: List[str] = []
+    addon_dir = addon_dir.resolve()
+    # don't package the distributions being built, when they are in the addon
+    outdir = outdir.resolve() if outdir else None
+    for dirpath, dirnames, filenames in os.walk(addon_dir):
+        if outdir is not None:
+            dirnames[:] = [d for d in dirnames if Path(dirpath, d) != outdir]
+        reldir = Path(dirpath).relative_to(addon_dir)
+        res.extend((reldir / f).as_posix() for f in filenames)
+    return sorted(res)
+
+
+def _is_sdist(addon_dir: Path) -> bool:
+    # if PKG-INFO is present, assume we are in an sdist
+    return addon_dir.joinpath("PKG-INFO").is_file()
+
+
+@span("list_files")
+def _list_files(addon_dir: Path, outdir: Optional[Path] = None) -> List[str]:
+    """List the files to package, relative to addon_dir.
+
+    outdir is the directory where the distributions are written, if any.
+    """
+    if _is_sdist(addon_dir):
+        # take everything
+        return _walk_files(addon_dir, outdir)
+    # take scm controlled files
     try:
-        scm_files = _scm_ls_files(addon_dir)
+        return sorted(_scm_ls_files(addon_dir))
     except NoScmFound:
         # NOTE This requires pip>=21.3 which builds in-tree. Previous pip versions
         # copied to a temporary directory with a different name than the addon, which
         # caused the resulting distribution name to be wrong.
-        shutil.copytree(addon_dir, dst)
-    else:
-        dst.mkdir()
-        for f in scm_files:
-            d = Path(f).parent
-            dstd = dst / d
-            if not dstd.is_dir():
-                dstd.mkdir(parents=True)
-            shutil.copy(addon_dir / f, dstd)
+        return _walk_files(addon_dir, outdir)
+
+
+@contextmanager
+def _open_git_blobs(addon_dir: Path) -> Iterator[Optional[GitBlobs]]:
+    """Provide a GitBlobs to read unmodified files from git objects, when enabled
+    with WHOOL_READ_GIT_OBJECTS."""
+    if not os.getenv("WHOOL_READ_GIT_OBJECTS") or _is_sdist(addon_dir):
+        yield None
+        return
+    with git_blobs(addon_dir) as blobs:
+        yield blobs
 
 
 def _ensure_absent(paths: List[Path]) -> None:
@@ -77,12 +177,15 @@ def _ensure_absent(paths: List[Path]) -> None:
             path.unlink()
 
 
-def _write_metadata(path: Path, msg: Message) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        Generator(f, mangle_from_=False, maxheaderlen=0).flatten(msg)
+def _serialize_metadata(msg: Message) -> str:
+    f = StringIO()
+    Generator(f, mangle_from_=False, maxheaderlen=0).flatten(msg)
+    return f.getvalue()
 
 
 def _prepare_wheel_metadata() -> Message:
+    from .version import version as whool_version
+
     msg = Message()
     msg["Wheel-Version"] = "1.0"  # of the spec
     msg["Generator"] = "Whool " + whool_version
@@ -95,22 +198,30 @@ def _normalize_dist_name(name: str) -> str:
     return re.sub(r"[-_.]+", "_", name).lower()
 
 
-def _make_dist_info(metadata: Message, dst: Path) -> str:
-    dist_info_dirname = "{}-{}.dist-info".format(
+def _get_dist_info_dirname(metadata: Message) -> str:
+    return "{}-{}.dist-info".format(
         _normalize_dist_name(metadata["Name"]), metadata["Version"]
     )
+
+
+@span("dist_info")
+def _get_dist_info_files(metadata: Message) -> List[Tuple[str, bytes]]:
+    return [
+        ("WHEEL", _serialize_metadata(_prepare_wheel_metadata()).encode("utf-8")),
+        ("METADATA", _serialize_metadata(metadata).encode("utf-8")),
+        ("top_level.txt", b"odoo"),
+    ]
+
+
+def _make_dist_info(metadata: Message, dst: Path) -> str:
+    dist_info_dirname = _get_dist_info_dirname(metadata)
     dist_info_path = dst / dist_info_dirname
     dist_info_path.mkdir()
-    _write_metadata(dist_info_path / "WHEEL", _prepare_wheel_metadata())
-    _write_metadata(dist_info_path / "METADATA", metadata)
-    (dist_info_path / "top_level.txt").write_text("odoo")
+    for name, content in _get_dist_info_files(metadata):
+        (dist_info_path / name).write_bytes(content)
     return dist_info_dirname
 
 
-def _make_pkg_info(metadata: Message, dst: Path) -> None:
-    _write_metadata(dst / "PKG-INFO", metadata)
-
-
 def _get_wheel_name(metadata: Message) -> str:
     return "{}-{}-{}.whl".format(
         _normalize_dist_name(metadata["Name"]), metadata["Version"], TAG
@@ -121,73 +232,467 @@ def _get_sdist_base_name(metadata: Message) -> str:
     return "{}-{}".format(_normalize_dist_name(metadata["Name"]), metadata["Version"])
 
 
+def _read_metadata(path: Path) -> Message:
+    with open(path, encoding="utf-8") as f:
+        return HeaderParser().parse(f)
+
+
 def _get_pkg_info_metadata(addon_dir: Path) -> Optional[Message]:
-    pkg_info_path = Path(addon_dir) / "PKG-INFO"
-    if not pkg_info_path.exists():
+    if not _is_sdist(addon_dir):
         return None
-    with open(pkg_info_path, encoding="utf-8") as f:
-        return HeaderParser().parse(f)
+    return _read_metadata(addon_dir / "PKG-INFO")
 
 
-def _get_metadata(addon_dir: Path) -> Message:
+def _get_compression_options(addon_dir: Path) -> CompressionOptions:
+    """Read the compression_level and uncompressed_extensions options."""
     options = load_pyproject_toml(addon_dir).get("tool", {}).get("whool", {})
+    level = options.get("compression_level")
+    if level is not None and (
+        isinstance(level, bool) or not isinstance(level, int) or not 0 <= level <= 9
+    ):
+        raise WhoolException(
+            f"compression_level must be an integer between 0 and 9, not {level!r}"
+        )
+    extensions = options.get("uncompressed_extensions", [])
+    if not isinstance(extensions, list) or not all(
+        isinstance(ext, str) for ext in extensions
+    ):
+        raise WhoolException("uncompressed_extensions must be a list of strings")
+    return CompressionOptions(
+        level, ["." + ext.lstrip(".").lower() for ext in extensions]
+    )
+
+
+def _compile_globs(name: str, patterns: Any) -> Optional[Pattern[str]]:
+    if not isinstance(patterns, list) or not all(
+        isinstance(pattern, str) for pattern in patterns
+    ):
+        raise WhoolException(f"{name} must be a list of glob patterns")
+    if not patterns:
+        return None
+    # a single regular expression, so each file is matched only once per pattern list
+    return re.compile(
+        "|".join(fnmatch.translate(pattern.strip("/")) for pattern in patterns)
+    )
+
+
+def _get_file_filter(addon_dir: Path, kind: str) -> FileFilter:
+    """Read the {kind}_include and {kind}_exclude options, where kind is wheel or
+    sdist."""
+    options = load_pyproject_toml(addon_dir).get("tool", {}).get("whool", {})
+    return FileFilter(
+        _compile_globs(f"{kind}_include", options.get(f"{kind}_include", [])),
+        _compile_globs(f"{kind}_exclude", options.get(f"{kind}_exclude", [])),
+    )
+
+
+def _get_metadata_cache_key(
+    addon_dir: Path, options: "MetadataOptions"
+) -> Optional[str]:
+    """Compute a key identifying everything metadata_from_addon_dir depends on.
+
+    Return None when the metadata can't be cached.
+    """
+    # imported here, as importlib.metadata is slow to import
+    from .compat import importlib_metadata
+    from .version import version as whool_version
+
+    head = git_head(addon_dir)
+    if not head:
+        return None
+    h = hashlib.sha256()
+    h.update(
+        json.dumps(
+            [
+                whool_version,
+                importlib_metadata.version("manifestoo-core"),
+                str(addon_dir.absolute()),
+                options,
+                head,
+                git_uncommitted(addon_dir),
+                # the version depends on the history available in shallow clones
+                git_shallow_commits(addon_dir),
+            ],
+            sort_keys=True,
+            default=str,
+        ).encode("utf-8")
+    )
+    h.update(_read_metadata_source_files(addon_dir))
+    return h.hexdigest()
+
+
+def _read_metadata_source_files(addon_dir: Path) -> bytes:
+    """Read the addon files the metadata depends on, with their names."""
+    res = []
+    for name in METADATA_SOURCE_FILES:
+        path = addon_dir / name
+        if path.is_file():
+            res.append(name.encode("utf-8") + b"\0" + path.read_bytes() + b"\0")
+    return b"".join(res)
+
+
+def _get_metadata_index_key(addon_dir: Path, options: "MetadataOptions") -> str:
+    """Compute a key identifying the addon files and options the metadata depends
+    on, without looking at the git history, which may not be available where the
+    metadata index is used."""
+    h = hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode("utf-8"))
+    h.update(_read_metadata_source_files(addon_dir))
+    return h.hexdigest()
+
+
+# the metadata indexes read in this process, with the stat of their file
+_metadata_indexes: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+
+def _read_metadata_index(path: Path) -> Dict[str, Any]:
+    try:
+        st = path.stat()
+    except OSError:
+        return {}
+    stat_key = (st.st_mtime_ns, st.st_size)
+    cached = _metadata_indexes.get(path)
+    if cached and cached[0] == stat_key:
+        return cached[1]
+    with path.open(encoding="utf-8") as f:
+        addons: Dict[str, Any] = json.load(f)["addons"]
+    _metadata_indexes[path] = (stat_key, addons)
+    return addons
+
+
+def _get_indexed_metadata(
+    addon_dir: Path, options: "MetadataOptions"
+) -> Optional[Message]:
+    """Return the metadata of an addon from the index file in $WHOOL_METADATA_INDEX,
+    if it has an up-to-date entry for the addon."""
+    index_path = os.getenv("WHOOL_METADATA_INDEX")
+    if not index_path:
+        return None
+    entry = _read_metadata_index(Path(index_path)).get(addon_dir.name)
+    if not entry or entry["key"] != _get_metadata_index_key(addon_dir, options):
+        return None
+    head = git_head(addon_dir)
+    # The post version depends on the git history and on uncommitted changes, which
+    # can only be checked when git is available.
+    if head and (
+        head != entry["head"] or git_uncommitted(addon_dir) != entry["uncommitted"]
+    ):
+        return None
+    return HeaderParser().parsestr(entry["metadata"])
+
+
+def _get_metadata_options(
+    addon_dir: Path, post_version: bool = True
+) -> "MetadataOptions":
+    """Return the options of metadata_from_addon_dir for an addon."""
+    options: MetadataOptions = (
+        load_pyproject_toml(addon_dir).get("tool", {}).get("whool", {})
+    )
     whool_post_version_strategy_override = os.getenv(
         "WHOOL_POST_VERSION_STRATEGY_OVERRIDE"
     )
     if whool_post_version_strategy_override:
         options["post_version_strategy_override"] = whool_post_version_strategy_override
-    return metadata_from_addon_dir(
-        addon_dir,
-        options,
-        precomputed_metadata_file=addon_dir.joinpath("PKG-INFO"),
+    if not post_version:
+        from manifestoo_core.git_postversion import POST_VERSION_STRATEGY_NONE
+
+        options["post_version_strategy_override"] = POST_VERSION_STRATEGY_NONE
+    return options
+
+
+def _get_metadata(
+    addon_dir: Path, post_version: bool = True, use_index: bool = True
+) -> Message:
+    """Compute the metadata of an addon.
+
+    When post_version is False, the version is the one of the manifest, and the git
+    history is not looked at.
+
+    When use_index is True and WHOOL_METADATA_INDEX is set, the metadata is read from
+    that index if it is up-to-date, without looking at the git history.
+
+    In an sdist, the metadata is read from PKG-INFO, without looking at the manifest
+    nor the git history, so the wheel has the same metadata as the sdist.
+    """
+    with span("metadata", addon=addon_dir.name) as attrs:
+        pkg_info_metadata = _get_pkg_info_metadata(addon_dir)
+        if pkg_info_metadata is not None:
+            attrs["sdist"] = True
+            return pkg_info_metadata
+        options = _get_metadata_options(addon_dir, post_version)
+        if post_version and use_index:
+            indexed_metadata = _get_indexed_metadata(addon_dir, options)
+            if indexed_metadata is not None:
+                attrs["indexed"] = True
+                return indexed_metadata
+        cache_key = None
+        if post_version and get_cache_dir():
+            # Computing the version from the git history is expensive, so cache the
+            # metadata, keyed on the git HEAD and the content of the addon files it
+            # depends on.
+            cache_key = _get_metadata_cache_key(addon_dir, options)
+            if cache_key:
+                cached = read_cache("metadata", cache_key)
+                attrs["cached"] = cached is not None
+                if cached is not None:
+                    return HeaderParser().parsestr(cached.decode("utf-8"))
+        from manifestoo_core.metadata import metadata_from_addon_dir
+
+        metadata = metadata_from_addon_dir(addon_dir, options)
+        if cache_key:
+            write_cache(
+                "metadata", cache_key, _serialize_metadata(metadata).encode("utf-8")
+            )
+        return metadata
+
+
+def _get_wheel_cache_key(addon_dir: Path, metadata: Message) -> Optional[str]:
+    """Compute a key identifying the content of the wheel of an addon.
+
+    The key is derived from the git blobs of the addon files, so it can only be
+    computed when the wheel is built from git controlled files that are not modified
+    in the working tree. Return None otherwise.
+    """
+    from .version import version as whool_version
+
+    if not get_cache_dir() or _is_sdist(addon_dir):
+        return None
+    try:
+        entries = git_ls_files(addon_dir)
+        if git_modified_files(addon_dir):
+            return None
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    if any(entry.mode not in REGULAR_FILE_MODES for entry in entries.values()):
+        # symlinks are followed, so their blob does not identify the content
+        return None
+    pyproject_toml_path = addon_dir / "pyproject.toml"
+    h = hashlib.sha256()
+    h.update(
+        json.dumps(
+            [
+                whool_version,
+                _serialize_metadata(metadata),
+                sorted(entries.items()),
+                os.getenv("SOURCE_DATE_EPOCH"),
+                hashlib.sha256(pyproject_toml_path.read_bytes()).hexdigest()
+                if pyproject_toml_path.is_file()
+                else None,
+            ]
+        ).encode("utf-8")
     )
+    return h.hexdigest()
 
 
-def _build_wheel(addon_dir: Path, wheel_directory: Path, editable: bool) -> str:
-    metadata = _get_metadata(addon_dir)
-    addon_name = distribution_name_to_addon_name(metadata["Name"])
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmppath = Path(tmpdir)
-        # always include metadata
-        _make_dist_info(metadata, tmppath)
-        if editable:
-            # Prepare {addon_dir}/build/__editable__/odoo/addon/{addon_name} symlink
-            build_dir = addon_dir / "build"
-            build_dir.mkdir(parents=True, exist_ok=True)
-            build_dir.joinpath(".gitignore").write_text("*")
-            editable_dir = build_dir / "__editable__"
-            if editable_dir.is_dir():
-                shutil.rmtree(editable_dir)
-            editable_addons_dir = editable_dir / "odoo" / "addons"
-            editable_addons_dir.mkdir(parents=True, exist_ok=True)
-            editable_addon_symlink = editable_addons_dir / addon_name
-            editable_addon_symlink.symlink_to(addon_dir, target_is_directory=True)
-            # Add .pth file pointing to {addon_dir}/build/__editable__ into the wheel
-            tmppath.joinpath(
-                _normalize_dist_name(metadata["Name"]) + ".pth"
-            ).write_text(str(editable_dir.resolve()))
-        else:
-            odoo_addon_path = tmppath / "odoo" / "addons"
-            odoo_addon_path.mkdir(parents=True)
-            odoo_addon_path = odoo_addon_path / addon_name
-            _copy_to(addon_dir, odoo_addon_path)
-            # we don't want pyproject.toml nor PKG-INFO in the wheel
-            _ensure_absent(
-                [odoo_addon_path / "pyproject.toml", odoo_addon_path / "PKG-INFO"]
-            )
-        subprocess.run(
+@contextmanager
+def _open_wheel(
+    wheel_file: Union[Path, IO[bytes]],
+    metadata: Message,
+    compression: Optional[CompressionOptions] = None,
+) -> Iterator["WheelWriter"]:
+    """Open a wheel for writing, and add the dist-info files when done.
+
+    wheel_file is a path, which is removed on error, or a file object.
+    """
+    import zlib
+
+    from .compress import get_compress_threads
+    from .wheelfile import WheelWriter
+
+    if compression is None:
+        compression = CompressionOptions(None, [])
+    dist_info_dirname = _get_dist_info_dirname(metadata)
+    try:
+        with WheelWriter(
+            wheel_file,
+            dist_info_dirname,
+            compression_level=zlib.Z_DEFAULT_COMPRESSION
+            if compression.level is None
+            else compression.level,
+            uncompressed_extensions=compression.uncompressed_extensions,
+            threads=get_compress_threads(),
+        ) as wheel:
+            yield wheel
+            # always include metadata, at the end of the archive
+            for name, content in _get_dist_info_files(metadata):
+                wheel.write_bytes(f"{dist_info_dirname}/{name}", content)
+    except BaseException:
+        if isinstance(wheel_file, Path):
+            _ensure_absent([wheel_file])
+        raise
+
+
+def _make_build_dir(addon_dir: Path) -> Path:
+    build_dir = addon_dir / "build"
+    gitignore = build_dir / ".gitignore"
+    if not gitignore.is_file():
+        build_dir.mkdir(parents=True, exist_ok=True)
+        gitignore.write_text("*")
+    return build_dir
+
+
+def _prepare_editable_dir(addon_dir: Path, addon_name: str) -> Path:
+    """Prepare {addon_dir}/build/__editable__/odoo/addon/{addon_name} symlink."""
+    build_dir = addon_dir / "build"
+    editable_dir = build_dir / "__editable__"
+    editable_addons_dir = editable_dir / "odoo" / "addons"
+    editable_addon_symlink = editable_addons_dir / addon_name
+    try:
+        if (
+            build_dir.joinpath(".gitignore").is_file()
+            and os.listdir(editable_addons_dir) == [addon_name]
+            and editable_addon_symlink.is_symlink()
+            and editable_addon_symlink.resolve() == addon_dir.resolve()
+        ):
+            # up-to-date from a previous editable install
+            return editable_dir
+    except OSError:
+        pass
+    _make_build_dir(addon_dir)
+    if editable_dir.is_dir():
+        shutil.rmtree(editable_dir)
+    editable_addons_dir.mkdir(parents=True, exist_ok=True)
+    editable_addon_symlink.symlink_to(addon_dir, target_is_directory=True)
+    return editable_dir
+
+
+def _prepare_shared_editable_dir(
+    addon_dir: Path, addon_name: str, editable_dir: Path
+) -> Path:
+    """Prepare {editable_dir}/odoo/addons/{addon_name} symlink, next to the ones of
+    the other addons installed in editable mode."""
+    editable_addons_dir = editable_dir / "odoo" / "addons"
+    editable_addon_symlink = editable_addons_dir / addon_name
+    if editable_addon_symlink.is_symlink():
+        if editable_addon_symlink.resolve() == addon_dir.resolve():
+            # up-to-date from a previous editable install
+            return editable_dir
+    elif editable_addon_symlink.exists():
+        raise WhoolException(f"{editable_addon_symlink} is not a symbolic link")
+    editable_addons_dir.mkdir(parents=True, exist_ok=True)
+    # replace the symlink atomically, as other addons may be installed concurrently
+    tmp_symlink = editable_addons_dir / f".{addon_name}.{os.getpid()}"
+    tmp_symlink.symlink_to(addon_dir, target_is_directory=True)
+    os.replace(tmp_symlink, editable_addon_symlink)
+    return editable_dir
+
+
+def _build_editable_wheel(
+    addon_dir: Path, wheel_directory: Path, metadata: Message
+) -> str:
+    from .version import version as whool_version
+
+    addon_name = _get_addon_name(metadata)
+    shared_editable_dir = os.getenv("WHOOL_EDITABLE_DIR")
+    if shared_editable_dir:
+        editable_dir = _prepare_shared_editable_dir(
+            addon_dir, addon_name, Path(shared_editable_dir).absolute()
+        )
+    else:
+        editable_dir = _prepare_editable_dir(addon_dir, addon_name)
+    pth_content = str(editable_dir.resolve())
+    wheel_name = _get_wheel_name(metadata)
+    wheel_path = wheel_directory / wheel_name
+    # The editable wheel only depends on the metadata and the editable directory, so
+    # the last one built is kept in the build directory and reused when they match,
+    # unless caching is disabled.
+    use_cache = get_cache_dir() is not None
+    key = hashlib.sha256(
+        json.dumps(
             [
-                sys.executable,
-                "-m",
-                "wheel",
-                "pack",
-                "-d",
-                os.fspath(wheel_directory),  # conv required on Windows Python 3.7 only
-                tmpdir,
-            ],
-            check=True,
+                whool_version,
+                _serialize_metadata(metadata),
+                pth_content,
+                os.getenv("SOURCE_DATE_EPOCH"),
+            ]
+        ).encode("utf-8")
+    ).hexdigest()
+    cached_wheel_dir = _make_build_dir(addon_dir) / "__editable_wheel__"
+    cached_wheel_path = cached_wheel_dir / wheel_name
+    cached_key_path = cached_wheel_dir / "KEY"
+    if use_cache:
+        try:
+            if cached_key_path.read_text() == key and cached_wheel_path.is_file():
+                shutil.copyfile(cached_wheel_path, wheel_path)
+                return wheel_name
+        except OSError:
+            pass
+    with span("pack_editable", addon=addon_name), _open_wheel(
+        wheel_path, metadata
+    ) as wheel:
+        # Add .pth file pointing to {addon_dir}/build/__editable__, or to the shared
+        # editable directory, which Python adds to sys.path only once
+        wheel.write_bytes(
+            _normalize_dist_name(metadata["Name"]) + ".pth",
+            pth_content.encode("utf-8"),
         )
-    return _get_wheel_name(metadata)
+    if cached_wheel_dir.is_dir():
+        shutil.rmtree(cached_wheel_dir)
+    if use_cache:
+        cached_wheel_dir.mkdir()
+        shutil.copyfile(wheel_path, cached_wheel_path)
+        cached_key_path.write_text(key)
+    return wheel_name
+
+
+def _write_wheel(
+    addon_dir: Path, wheel_file: Union[Path, IO[bytes]], metadata: Message
+) -> None:
+    addon_name = _get_addon_name(metadata)
+    compression = _get_compression_options(addon_dir)
+    file_filter = _get_file_filter(addon_dir, "wheel")
+    with span("pack_wheel", addon=addon_name), _open_wheel(
+        wheel_file, metadata, compression
+    ) as wheel, _open_git_blobs(addon_dir) as blobs:
+        outdir = wheel_file.parent if isinstance(wheel_file, Path) else None
+        for f in _list_files(addon_dir, outdir):
+            # we don't want pyproject.toml nor PKG-INFO in the wheel
+            if f in ("pyproject.toml", "PKG-INFO") or not file_filter.matches(f):
+                continue
+            arcname = f"odoo/addons/{addon_name}/{f}"
+            blob = blobs.read(f) if blobs else None
+            if blob:
+                wheel.write_bytes(arcname, blob[1], mode=blob[0])
+            else:
+                wheel.write_file(arcname, addon_dir / f)
+
+
+def _build_wheel(
+    addon_dir: Path,
+    wheel_directory: Path,
+    editable: bool,
+    metadata: Optional[Message] = None,
+) -> str:
+    if metadata is None:
+        metadata = _get_metadata(addon_dir)
+    if editable:
+        return _build_editable_wheel(addon_dir, wheel_directory, metadata)
+    addon_name = _get_addon_name(metadata)
+    wheel_name = _get_wheel_name(metadata)
+    wheel_path = wheel_directory / wheel_name
+    with span("wheel_cache", addon=addon_name) as attrs:
+        cache_key = _get_wheel_cache_key(addon_dir, metadata)
+        if cache_key:
+            cached_wheel_path = get_cached_file("wheels", cache_key)
+            attrs["cached"] = bool(
+                cached_wheel_path and cached_wheel_path.name == wheel_name
+            )
+            if cached_wheel_path and attrs["cached"]:
+                shutil.copyfile(cached_wheel_path, wheel_path)
+                return wheel_name
+    _write_wheel(addon_dir, wheel_path, metadata)
+    if cache_key:
+        add_file_to_cache("wheels", cache_key, wheel_path)
+    return wheel_name
+
+
+def _get_prepared_metadata(metadata_directory: Optional[str]) -> Optional[Message]:
+    """Return the metadata written by prepare_metadata_for_build_wheel, if any."""
+    if not metadata_directory:
+        return None
+    metadata_path = Path(metadata_directory) / "METADATA"
+    if not metadata_path.is_file():
+        return None
+    return _read_metadata(metadata_path)
 
 
 def build_wheel(
@@ -195,7 +700,17 @@ def build_wheel(
     config_settings: Optional[Dict[str, Any]] = None,
     metadata_directory: Optional[str] = None,
 ) -> str:
-    return _build_wheel(Path.cwd(), Path(wheel_directory), editable=False)
+    res = call_server(
+        "build_wheel", wheel_directory, config_settings, metadata_directory
+    )
+    if res is not None:
+        return res
+    return _build_wheel(
+        Path.cwd(),
+        Path(wheel_directory),
+        editable=False,
+        metadata=_get_prepared_metadata(metadata_directory),
+    )
 
 
 def build_editable(
@@ -203,36 +718,110 @@ def build_editable(
     config_settings: Optional[Dict[str, Any]] = None,
     metadata_directory: Optional[str] = None,
 ) -> str:
-    return _build_wheel(Path.cwd(), Path(wheel_directory), editable=True)
+    res = call_server(
+        "build_editable", wheel_directory, config_settings, metadata_directory
+    )
+    if res is not None:
+        return res
+    return _build_wheel(
+        Path.cwd(),
+        Path(wheel_directory),
+        editable=True,
+        metadata=_get_prepared_metadata(metadata_directory),
+    )
+
+
+def _add_bytes_to_tar(
+    tf: "tarfile.TarFile", arcname: str, data: bytes, mode: int = 0o644
+) -> None:
+    import tarfile
+
+    tarinfo = tarfile.TarInfo(arcname)
+    tarinfo.size = len(data)
+    tarinfo.mtime = int(os.getenv("SOURCE_DATE_EPOCH") or time.time())
+    tarinfo.mode = mode
+    tf.addfile(tarinfo, BytesIO(data))
 
 
-def _build_sdist(addon_dir: Path, sdist_directory: Path) -> str:
-    metadata = _get_metadata(addon_dir)
+def _clamp_tar_mtime(tarinfo: "tarfile.TarInfo") -> "tarfile.TarInfo":
+    # sdists are reproducible when SOURCE_DATE_EPOCH is set, like wheels
+    source_date_epoch = os.getenv("SOURCE_DATE_EPOCH")
+    if source_date_epoch:
+        tarinfo.mtime = min(tarinfo.mtime, int(source_date_epoch))
+    return tarinfo
+
+
+def _write_sdist(
+    addon_dir: Path,
+    sdist_file: IO[bytes],
+    metadata: Message,
+    outdir: Optional[Path] = None,
+) -> None:
+    import tarfile
+
+    from .compress import GzipWriter, get_compress_threads
+
     sdist_name = _get_sdist_base_name(metadata)
-    sdist_tar_name = sdist_name + ".tar.gz"
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpppath = Path(tmpdir)
-        sdist_tmpdir = tmpppath / sdist_name
-        _copy_to(addon_dir, sdist_tmpdir)
-        _make_pkg_info(metadata, sdist_tmpdir)
-        with tarfile.open(
-            str(sdist_directory / sdist_tar_name),
-            mode="w|gz",
-            format=tarfile.PAX_FORMAT,
-        ) as tf:
-            tf.add(str(sdist_tmpdir), arcname=sdist_name)
+    compression = _get_compression_options(addon_dir)
+    file_filter = _get_file_filter(addon_dir, "sdist")
+    with span("pack_sdist", addon=addon_dir.name), GzipWriter(
+        sdist_file,
+        level=9 if compression.level is None else compression.level,
+        threads=get_compress_threads(),
+    ) as gz, tarfile.open(  # type: ignore[call-overload]
+        fileobj=gz,
+        mode="w|",
+        format=tarfile.PAX_FORMAT,
+        dereference=True,
+    ) as tf, _open_git_blobs(addon_dir) as blobs:
+        for f in _list_files(addon_dir, outdir):
+            if f == "PKG-INFO" or not file_filter.matches(f):
+                continue
+            arcname = f"{sdist_name}/{f}"
+            blob = blobs.read(f) if blobs else None
+            if blob:
+                _add_bytes_to_tar(tf, arcname, blob[1], mode=blob[0])
+            else:
+                tf.add(str(addon_dir / f), arcname=arcname, filter=_clamp_tar_mtime)
+        pkg_info = _serialize_metadata(metadata).encode("utf-8")
+        _add_bytes_to_tar(tf, f"{sdist_name}/PKG-INFO", pkg_info)
+
+
+def _build_sdist(
+    addon_dir: Path,
+    sdist_directory: Path,
+    metadata: Optional[Message] = None,
+) -> str:
+    if metadata is None:
+        metadata = _get_metadata(addon_dir)
+    sdist_tar_name = _get_sdist_base_name(metadata) + ".tar.gz"
+    sdist_path = sdist_directory / sdist_tar_name
+    try:
+        with sdist_path.open("wb") as sdist_file:
+            _write_sdist(addon_dir, sdist_file, metadata, sdist_directory)
+    except BaseException:
+        _ensure_absent([sdist_path])
+        raise
     return sdist_tar_name
 
 
 def build_sdist(
     sdist_directory: str, config_settings: Optional[Dict[str, Any]] = None
 ) -> str:
+    res = call_server("build_sdist", sdist_directory, config_settings)
+    if res is not None:
+        return res
     return _build_sdist(Path.cwd(), Path(sdist_directory))
 
 
 def prepare_metadata_for_build_wheel(
     metadata_directory: str, config_settings: Optional[Dict[str, Any]] = None
 ) -> str:
+    res = call_server(
+        "prepare_metadata_for_build_wheel", metadata_directory, config_settings
+    )
+    if res is not None:
+        return res
     metadata = _get_metadata(Path.cwd())
     return _make_dist_info(metadata, Path(metadata_directory))
 
@@ -0,0 +1,210 @@
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MAX_SIZE = 1024**3
+# the subdirectories of the cache directory that whool writes, as it may be shared
+# with other tools
+NAMESPACES = ("metadata", "wheels")
+SIZE_RE = re.compile(r"^\s*(?P<size>\d+)\s*(?P<unit>[KMG]?)i?B?\s*$", re.IGNORECASE)
+
+
+class CacheEntry(NamedTuple):
+    namespace: str
+    key: str
+    path: Path
+    size: int
+    last_used: float
+
+
+def parse_size(s: str) -> int:
+    """Parse a size in bytes, with an optional K, M or G suffix."""
+    mo = SIZE_RE.match(s)
+    if not mo:
+        raise ValueError(f"Invalid size: {s!r}")
+    unit = mo.group("unit").upper()
+    return int(mo.group("size")) << (10 * " KMG".index(unit or " "))
+
+
+def get_cache_dir() -> Optional[Path]:
+    """Return the whool cache directory, or None if caching is disabled.
+
+    The cache directory is $WHOOL_CACHE_DIR, or $XDG_CACHE_HOME/whool, or
+    ~/.cache/whool. Caching is disabled when WHOOL_NO_CACHE is set.
+    """
+    if os.getenv("WHOOL_NO_CACHE"):
+        return None
+    cache_dir = os.getenv("WHOOL_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir)
+    xdg_cache_home = os.getenv("XDG_CACHE_HOME")
+    if xdg_cache_home:
+        return Path(xdg_cache_home) / "whool"
+    return Path.home() / ".cache" / "whool"
+
+
+def get_cache_max_size() -> int:
+    """Return the maximum cache size, from $WHOOL_CACHE_MAX_SIZE (default 1G)."""
+    max_size = os.getenv("WHOOL_CACHE_MAX_SIZE")
+    if max_size:
+        return parse_size(max_size)
+    return DEFAULT_CACHE_MAX_SIZE
+
+
+def _touch(path: Path) -> None:
+    # the modification time of cache entries records when they were last used
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def read_cache(namespace: str, key: str) -> Optional[bytes]:
+    cache_dir = get_cache_dir()
+    if not cache_dir:
+        return None
+    path = cache_dir / namespace / key
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    _touch(path)
+    return data
+
+
+def write_cache(namespace: str, key: str, data: bytes) -> None:
+    import tempfile
+
+    cache_dir = get_cache_dir()
+    if not cache_dir:
+        return
+    path = cache_dir / namespace / key
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write atomically, as concurrent builds may share the cache
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+    except OSError as e:
+        _logger.debug("Could not write %s to cache: %s", path, e)
+
+
+def get_cached_file(namespace: str, key: str) -> Optional[Path]:
+    """Return the file stored in the cache for key, if any."""
+    cache_dir = get_cache_dir()
+    if not cache_dir:
+        return None
+    entry_path = cache_dir / namespace / key
+    try:
+        files = list(entry_path.iterdir())
+    except OSError:
+        return None
+    if len(files) != 1:
+        return None
+    _touch(entry_path)
+    return files[0]
+
+
+def add_file_to_cache(namespace: str, key: str, path: Path) -> None:
+    """Store a copy of the file at path in the cache for key, keeping its name.
+
+    Least recently used entries are then evicted if the cache exceeds its maximum
+    size.
+    """
+    import tempfile
+
+    cache_dir = get_cache_dir()
+    if not cache_dir:
+        return
+    entry_path = cache_dir / namespace / key
+    try:
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(tempfile.mkdtemp(dir=entry_path.parent, prefix=".tmp-"))
+        try:
+            shutil.copyfile(path, tmp_path / path.name)
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            shutil.rmtree(tmp_path)
+            raise
+    except OSError as e:
+        _logger.debug("Could not add %s to cache: %s", path, e)
+        return
+    prune_cache(get_cache_max_size())
+
+
+def _get_size(path: Path) -> int:
+    if not path.is_dir():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.iterdir())
+
+
+def list_cache_entries() -> List[CacheEntry]:
+    """Return all cache entries, least recently used first."""
+    cache_dir = get_cache_dir()
+    if not cache_dir or not cache_dir.is_dir():
+        return []
+    res = []
+    for namespace in NAMESPACES:
+        namespace_path = cache_dir / namespace
+        if not namespace_path.is_dir():
+            continue
+        for path in namespace_path.iterdir():
+            if path.name.startswith("."):
+                continue
+            try:
+                res.append(
+                    CacheEntry(
+                        namespace,
+                        path.name,
+                        path,
+                        _get_size(path),
+                        path.stat().st_mtime,
+                    )
+                )
+            except OSError:
+                # removed concurrently
+                continue
+    return sorted(res, key=lambda entry: entry.last_used)
+
+
+def _remove_entry(entry: CacheEntry) -> None:
+    if entry.path.is_dir():
+        shutil.rmtree(entry.path, ignore_errors=True)
+    else:
+        try:
+            entry.path.unlink()
+        except OSError:
+            pass
+
+
+def prune_cache(max_size: int) -> List[CacheEntry]:
+    """Evict least recently used cache entries until the cache size is at most
+    max_size. Return the evicted entries."""
+    entries = list_cache_entries()
+    size = sum(entry.size for entry in entries)
+    res = []
+    for entry in entries:
+        if size <= max_size:
+            break
+        _remove_entry(entry)
+        size -= entry.size
+        res.append(entry)
+    return res
+
+
+def clear_cache() -> List[CacheEntry]:
+    """Remove all cache entries. Return the removed entries."""
+    entries = list_cache_entries()
+    for entry in entries:
+        _remove_entry(entry)
+    return entries
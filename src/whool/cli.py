@@ -1,12 +1,175 @@
 import argparse
+import json
 import logging
+import os
 import sys
+from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
 
-from .init import init
+from .build import BuildError, build, write_sdist, write_wheel
+from .buildapi import WhoolException
+from .cache import (
+    clear_cache,
+    get_cache_dir,
+    get_cache_max_size,
+    list_cache_entries,
+    parse_size,
+    prune_cache,
+)
+from .init import init_paths
+from .metadata import iter_metadata, metadata_to_json, write_metadata_index
+from .server import SOCKET_ENV_VAR, ServerError, get_default_socket_path, serve
+from .timing import collect_trace, format_profile
 from .version import version
 
+_logger = logging.getLogger(__name__)
+
+
+def _format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    fsize = size / 1024
+    for unit in ("KiB", "MiB"):
+        if fsize < 1024:
+            return f"{fsize:.1f} {unit}"
+        fsize /= 1024
+    return f"{fsize:.1f} GiB"
+
+
+def _init(args: argparse.Namespace) -> int:
+    modified_dirs = init_paths(args.paths or [Path.cwd()], args.max_depth, args.exclude)
+    if args.exit_non_zero_on_changes and modified_dirs:
+        modified_str = ", ".join(os.path.relpath(p) for p in modified_dirs)
+        sys.stderr.write(
+            f"pyproject.toml was generated or modified in {modified_str}\n"
+        )
+        return 1
+    return 0
+
+
+def _build_to_stdout(args: argparse.Namespace) -> int:
+    if args.wheel == args.sdist or args.ref or args.changed_since or args.index:
+        sys.stderr.write(
+            "--outdir - requires one of --wheel or --sdist, "
+            "and is not supported with --ref, --changed-since or --index\n"
+        )
+        return 1
+    write = write_wheel if args.wheel else write_sdist
+    try:
+        name = write(args.dir, sys.stdout.buffer)
+    except Exception as e:
+        sys.stderr.write(f"Failed to build {args.dir}: {e}\n")
+        return 1
+    sys.stdout.buffer.flush()
+    _logger.info("Built %s", name)
+    return 0
+
+
+def _build(args: argparse.Namespace) -> int:
+    if args.outdir == Path("-"):
+        return _build_to_stdout(args)
+    wheel = args.wheel or not args.sdist
+    sdist = args.sdist or not args.wheel
+    try:
+        build(
+            args.dir,
+            args.outdir or args.dir / "dist",
+            wheel=wheel,
+            sdist=sdist,
+            jobs=args.jobs,
+            ref=args.ref,
+            changed_since=args.changed_since,
+            index=args.index,
+        )
+    except BuildError as e:
+        for addon_dir, exc in e.failures.items():
+            sys.stderr.write(f"Failed to build {addon_dir}: {exc}\n")
+        return 1
+    except WhoolException as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+    return 0
+
+
+def _cache(cmd: str, args: argparse.Namespace) -> int:
+    if cmd == "info":
+        cache_dir = get_cache_dir()
+        entries = list_cache_entries()
+        sys.stdout.write(f"Cache directory: {cache_dir or '(disabled)'}\n")
+        sys.stdout.write(f"Maximum size: {_format_size(get_cache_max_size())}\n")
+        sys.stdout.write(
+            f"Size: {_format_size(sum(entry.size for entry in entries))} "
+            f"in {len(entries)} entries\n"
+        )
+        return 0
+    if cmd == "list":
+        for entry in list_cache_entries():
+            last_used = datetime.fromtimestamp(entry.last_used).isoformat(
+                " ", "seconds"
+            )
+            description = entry.key
+            if entry.path.is_dir():
+                # show the name of the cached file
+                description += " " + " ".join(p.name for p in entry.path.iterdir())
+            sys.stdout.write(
+                f"{last_used} {_format_size(entry.size):>9} "
+                f"{entry.namespace} {description}\n"
+            )
+        return 0
+    if cmd == "prune":
+        max_size = args.max_size
+        if max_size is None:
+            max_size = get_cache_max_size()
+        evicted = prune_cache(max_size)
+        sys.stdout.write(
+            f"Evicted {len(evicted)} entries "
+            f"({_format_size(sum(entry.size for entry in evicted))})\n"
+        )
+        return 0
+    removed = clear_cache()
+    sys.stdout.write(
+        f"Removed {len(removed)} entries "
+        f"({_format_size(sum(entry.size for entry in removed))})\n"
+    )
+    return 0
+
+
+def _metadata(args: argparse.Namespace) -> int:
+    failed = False
+    for dir in args.dirs or [Path.cwd()]:
+        for _, metadata in iter_metadata(dir, post_version=not args.no_post_version):
+            if isinstance(metadata, Exception):
+                failed = True
+                continue
+            sys.stdout.write(json.dumps(metadata_to_json(metadata)) + "\n")
+    return 1 if failed else 0
+
+
+def _stamp(args: argparse.Namespace) -> int:
+    try:
+        ok = write_metadata_index(args.dirs or [Path.cwd()], args.output)
+    except WhoolException as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+    return 0 if ok else 1
+
+
+def _serve(args: argparse.Namespace) -> int:
+    try:
+        socket_path = args.socket or get_default_socket_path()
+        sys.stderr.write(
+            f"Serving on {socket_path}, "
+            f"set {SOCKET_ENV_VAR}={socket_path} to build with this server.\n"
+        )
+        serve(socket_path)
+    except ServerError as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
 
 def main(argv: Optional[List[str]] = None) -> int:
     if argv is None:
@@ -32,7 +195,7 @@ def main(argv: Optional[List[str]] = None) -> int:
         help=(
             "Initialize pyproject.toml files with the whool build-system. "
             "This is done in the current directory if it is an addon, "
-            "else in immediate subdirectories that are addons."
+            "else in subdirectories that are addons."
         ),
     )
     init_ap.add_argument(
@@ -41,11 +204,189 @@ def main(argv: Optional[List[str]] = None) -> int:
         help="Exit with non-zero status if any changes were made.",
     )
     init_ap.add_argument(
+        "--max-depth",
+        type=int,
+        default=1,
+        help="How deep to search subdirectories for addons (default: 1).",
+    )
+    init_ap.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help=(
+            "Do not search directories matching this glob pattern, by name or by "
+            "relative path. Can be repeated."
+        ),
+    )
+    init_ap.add_argument(
+        "paths",
+        type=Path,
+        nargs="*",
+        help=(
+            "Addon(s) directories to initialize, or files of addons to initialize "
+            "(default: current directory)."
+        ),
+    )
+
+    build_ap = subparsers.add_parser(
+        "build",
+        help=(
+            "Build distribution packages in the current directory if it is an addon, "
+            "else for all immediate subdirectories that are addons."
+        ),
+    )
+    build_ap.add_argument(
+        "--wheel",
+        action="store_true",
+        help="Build wheels (default: build wheels and sdists).",
+    )
+    build_ap.add_argument(
+        "--sdist",
+        action="store_true",
+        help="Build sdists (default: build wheels and sdists).",
+    )
+    build_ap.add_argument(
+        "--outdir",
+        "-o",
+        type=Path,
+        help=(
+            "Output directory (default: dist in the addon(s) directory). "
+            "With -, write the wheel or sdist of the addon to stdout."
+        ),
+    )
+    build_ap.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of addons to build in parallel (0: one per CPU, default: 1).",
+    )
+    build_ap.add_argument(
+        "--ref",
+        help=(
+            "Build the addons as of this git ref (commit, branch or tag), "
+            "without checking out the rest of the repository."
+        ),
+    )
+    build_ap.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help=(
+            "Build only the addons with files that changed since this git ref, "
+            "or in this git range (e.g. origin/main...HEAD)."
+        ),
+    )
+    build_ap.add_argument(
+        "--index",
+        action="store_true",
+        help=(
+            "Write a PEP 503 simple index of the output directory in its simple "
+            "subdirectory, with PEP 658 metadata files for wheels."
+        ),
+    )
+    build_ap.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time spent in each build phase.",
+    )
+    build_ap.add_argument(
         "dir",
         type=Path,
         nargs="?",
         default=Path.cwd(),
-        help="Addon(s) directory to initialize (default: current directory).",
+        help="Addon(s) directory to build (default: current directory).",
+    )
+
+    cache_ap = subparsers.add_parser(
+        "cache",
+        help="Inspect and manage the whool cache.",
+    )
+    cache_subparsers = cache_ap.add_subparsers(title="cache subcommands", dest="cmd")
+    cache_subparsers.add_parser(
+        "info",
+        help="Show the cache location and size.",
+    )
+    cache_subparsers.add_parser(
+        "list",
+        help="List cache entries, least recently used first.",
+    )
+    prune_ap = cache_subparsers.add_parser(
+        "prune",
+        help="Evict least recently used entries until the cache is small enough.",
+    )
+    prune_ap.add_argument(
+        "--max-size",
+        type=parse_size,
+        help=(
+            "Maximum cache size in bytes, with an optional K, M or G suffix "
+            "(default: $WHOOL_CACHE_MAX_SIZE or 1G)."
+        ),
+    )
+    cache_subparsers.add_parser(
+        "clear",
+        help="Remove all cache entries.",
+    )
+
+    metadata_ap = subparsers.add_parser(
+        "metadata",
+        help=(
+            "Print the metadata of the addon in the current directory, or of all "
+            "immediate subdirectories that are addons, as JSON lines."
+        ),
+    )
+    metadata_ap.add_argument(
+        "--no-post-version",
+        action="store_true",
+        help=(
+            "Use the version of the manifest, without computing the post version "
+            "from the git history. This is faster when only dependencies are needed."
+        ),
+    )
+    metadata_ap.add_argument(
+        "dirs",
+        type=Path,
+        nargs="*",
+        help="Addon(s) directories (default: current directory).",
+    )
+
+    stamp_ap = subparsers.add_parser(
+        "stamp",
+        help=(
+            "Compute the metadata of the addon in the current directory, or of all "
+            "immediate subdirectories that are addons, and write them to a metadata "
+            "index file, that builds use instead of the git history when "
+            "WHOOL_METADATA_INDEX is set to its path."
+        ),
+    )
+    stamp_ap.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        default=Path("whool-metadata.json"),
+        help="Metadata index file (default: whool-metadata.json).",
+    )
+    stamp_ap.add_argument(
+        "dirs",
+        type=Path,
+        nargs="*",
+        help="Addon(s) directories (default: current directory).",
+    )
+
+    serve_ap = subparsers.add_parser(
+        "serve",
+        help=(
+            "Run a server that the build backend hooks use when "
+            f"{SOCKET_ENV_VAR} is set, to avoid repeating work across builds."
+        ),
+    )
+    serve_ap.add_argument(
+        "--socket",
+        type=Path,
+        help=(
+            "Path of the unix socket to listen on "
+            "(default: $XDG_RUNTIME_DIR/whool.sock or /tmp/whool-$UID.sock)."
+        ),
     )
 
     args = ap.parse_args(argv)
@@ -58,16 +399,30 @@ def main(argv: Optional[List[str]] = None) -> int:
     logging.basicConfig(level=log_level)
 
     if args.subcmd == "init":
-        modified_files = init(args.dir)
-        if args.exit_non_zero_on_changes and modified_files:
-            modified_str = ", ".join(
-                str(p.relative_to(args.dir)) for p in modified_files
-            )
-            sys.stderr.write(
-                f"pyproject.toml was generated or modified in {modified_str}\n"
-            )
-            return 1
-        return 0
+        return _init(args)
+
+    if args.subcmd == "build":
+        if not args.profile:
+            return _build(args)
+        with collect_trace() as records:
+            r = _build(args)
+        sys.stderr.write(format_profile(records))
+        return r
+
+    if args.subcmd == "cache":
+        if not args.cmd:
+            cache_ap.print_help()
+            return 2
+        return _cache(args.cmd, args)
+
+    if args.subcmd == "metadata":
+        return _metadata(args)
+
+    if args.subcmd == "stamp":
+        return _stamp(args)
+
+    if args.subcmd == "serve":
+        return _serve(args)
 
     ap.print_help()
     return 2
@@ -1,14 +1,29 @@
 import sys
+from typing import TYPE_CHECKING, Any
 
 __all__ = [
     "importlib_metadata",
     "tomllib",
 ]
 
-if sys.version_info < (3, 8):  # pragma: no cover (<PY38)
-    import importlib_metadata
-else:  # pragma: no cover (PY38+)
-    import importlib.metadata as importlib_metadata
+if TYPE_CHECKING:
+    if sys.version_info < (3, 8):
+        import importlib_metadata
+    else:
+        import importlib.metadata as importlib_metadata
+else:
+
+    def __getattr__(name: str) -> Any:
+        # importlib.metadata is imported on first use, as it imports zipfile and
+        # tempfile, which the build backend must not import at startup
+        if name != "importlib_metadata":
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        if sys.version_info < (3, 8):  # pragma: no cover (<PY38)
+            import importlib_metadata
+        else:  # pragma: no cover (PY38+)
+            import importlib.metadata as importlib_metadata
+        return importlib_metadata
+
 
 if sys.version_info < (3, 11):
     import tomli as tomllib
@@ -0,0 +1,152 @@
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import TracebackType
+from typing import IO, Any, Callable, Deque, Generic, Optional, Type, TypeVar
+
+T = TypeVar("T")
+
+MAX_DEFAULT_THREADS = 4
+# gzip is compressed in blocks of this size, each primed with the end of the
+# previous one so the compression ratio is the same as with a single stream
+GZIP_BLOCK_SIZE = 256 * 1024
+DEFLATE_WINDOW_SIZE = 32 * 1024
+
+
+def get_compress_threads() -> int:
+    """Return the number of threads used to compress archives.
+
+    This is $WHOOL_COMPRESS_THREADS, or the number of CPUs up to 4.
+    """
+    threads = os.getenv("WHOOL_COMPRESS_THREADS")
+    if threads:
+        return max(int(threads), 1)
+    return min(os.cpu_count() or 1, MAX_DEFAULT_THREADS)
+
+
+class OrderedThreadPool(Generic[T]):
+    """Run tasks in a thread pool, and consume their results in submission order.
+
+    The number of pending results is bounded, so memory use stays proportional to
+    the number of threads. With a single thread, tasks run synchronously.
+    """
+
+    def __init__(self, threads: int, consume: Callable[[T], None]) -> None:
+        self._threads = threads
+        self._consume = consume
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Deque[Future[T]] = deque()
+
+    def submit(self, fn: Callable[..., T], *args: Any, inline: bool = False) -> None:
+        """Run fn(*args), in the calling thread if inline is True."""
+        if self._threads <= 1 or inline:
+            future: Future[T] = Future()
+            future.set_result(fn(*args))
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._threads)
+            future = self._executor.submit(fn, *args)
+        self._pending.append(future)
+        while self._pending and (
+            self._pending[0].done() or len(self._pending) > 2 * self._threads
+        ):
+            self._consume(self._pending.popleft().result())
+
+    def flush(self) -> None:
+        """Wait for all pending tasks and consume their results."""
+        while self._pending:
+            self._consume(self._pending.popleft().result())
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """Stop the threads, discarding pending results."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._pending.clear()
+
+
+def _deflate_block(data: bytes, zdict: bytes, level: int) -> bytes:
+    if zdict:
+        compressor = zlib.compressobj(
+            level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict
+        )
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class GzipWriter:
+    """A write-only gzip stream, compressed in parallel blocks.
+
+    Each block is compressed independently, like pigz does, so the output does not
+    depend on the number of threads. The gzip header timestamp is taken from
+    SOURCE_DATE_EPOCH, or 0, so the output only depends on the compressed data.
+    """
+
+    def __init__(self, fileobj: IO[bytes], level: int = 9, threads: int = 1) -> None:
+        self._fileobj = fileobj
+        self._level = level
+        self._pool: OrderedThreadPool[bytes] = OrderedThreadPool(
+            threads, self._write_block
+        )
+        self._buffer = bytearray()
+        self._zdict = b""
+        self._crc = 0
+        self._size = 0
+        mtime = int(os.getenv("SOURCE_DATE_EPOCH") or 0)
+        # magic, deflate, no flags, mtime, no extra flags, unknown OS
+        fileobj.write(struct.pack("<BBBBLBB", 0x1F, 0x8B, 8, 0, mtime, 0, 255))
+
+    def _write_block(self, data: bytes) -> None:
+        self._fileobj.write(data)
+
+    def _submit_block(self, block: bytes) -> None:
+        self._crc = zlib.crc32(block, self._crc)
+        self._size += len(block)
+        self._pool.submit(_deflate_block, block, self._zdict, self._level)
+        self._zdict = block[-DEFLATE_WINDOW_SIZE:]
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        while len(self._buffer) >= GZIP_BLOCK_SIZE:
+            self._submit_block(bytes(self._buffer[:GZIP_BLOCK_SIZE]))
+            del self._buffer[:GZIP_BLOCK_SIZE]
+        return len(data)
+
+    def close(self) -> None:
+        """Write the end of the gzip stream. The underlying file is not closed."""
+        if self._buffer:
+            self._submit_block(bytes(self._buffer))
+            self._buffer.clear()
+        self._pool.close()
+        # an empty final block ends the deflate stream
+        self._fileobj.write(
+            zlib.compressobj(self._level, zlib.DEFLATED, -zlib.MAX_WBITS).flush()
+        )
+        self._fileobj.write(struct.pack("<LL", self._crc, self._size & 0xFFFFFFFF))
+
+    def abort(self) -> None:
+        """Stop compressing, without completing the gzip stream."""
+        self._pool.shutdown()
+
+    def __enter__(self) -> "GzipWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,123 @@
+import hashlib
+import html
+import re
+import zipfile
+from email.parser import BytesHeaderParser
+from pathlib import Path
+from typing import Dict, List, Optional
+
+INDEX_DIRNAME = "simple"
+METADATA_SUFFIX = ".metadata"
+
+
+def _normalize_project_name(name: str) -> str:
+    # PEP 503
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _get_project_name(filename: str) -> Optional[str]:
+    if filename.endswith(".whl"):
+        return _normalize_project_name(filename.split("-", 1)[0])
+    if filename.endswith(".tar.gz"):
+        return _normalize_project_name(filename.rsplit("-", 1)[0])
+    return None
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_metadata_file(wheel_path: Path, metadata: bytes) -> None:
+    """Write the PEP 658 metadata file of a wheel, next to it."""
+    wheel_path.with_name(wheel_path.name + METADATA_SUFFIX).write_bytes(metadata)
+
+
+def _read_metadata_file(wheel_path: Path) -> bytes:
+    """Read the metadata file of a wheel, extracting it from the wheel if needed."""
+    metadata_path = wheel_path.with_name(wheel_path.name + METADATA_SUFFIX)
+    if metadata_path.is_file():
+        return metadata_path.read_bytes()
+    dist_info_dirname = "-".join(wheel_path.name.split("-", 2)[:2]) + ".dist-info"
+    with zipfile.ZipFile(wheel_path) as zf:
+        metadata = zf.read(f"{dist_info_dirname}/METADATA")
+    write_metadata_file(wheel_path, metadata)
+    return metadata
+
+
+def _make_link(path: Path) -> str:
+    attrs = {"href": f"../../{path.name}#sha256={_file_sha256(path)}"}
+    if path.name.endswith(".whl"):
+        metadata = _read_metadata_file(path)
+        requires_python = BytesHeaderParser().parsebytes(metadata)["Requires-Python"]
+        if requires_python:
+            attrs["data-requires-python"] = requires_python
+        # PEP 658 and its PEP 714 rename, for older and newer installers
+        attrs["data-dist-info-metadata"] = f"sha256={_sha256(metadata)}"
+        attrs["data-core-metadata"] = f"sha256={_sha256(metadata)}"
+    attrs_str = " ".join(
+        f'{name}="{html.escape(value, quote=True)}"' for name, value in attrs.items()
+    )
+    return f"<a {attrs_str}>{html.escape(path.name)}</a><br/>"
+
+
+def _make_page(title: str, links: List[str]) -> str:
+    return "\n".join(
+        [
+            "<!DOCTYPE html>",
+            "<html>",
+            "<head>",
+            '<meta name="pypi:repository-version" content="1.0">',
+            f"<title>{html.escape(title)}</title>",
+            "</head>",
+            "<body>",
+            f"<h1>{html.escape(title)}</h1>",
+            *links,
+            "</body>",
+            "</html>",
+            "",
+        ]
+    )
+
+
+def write_index(dir: Path) -> None:
+    """Write a PEP 503 simple repository index of the wheels and sdists in dir, in
+    its simple subdirectory.
+
+    Wheels are linked with their PEP 658 metadata file, which is extracted from the
+    wheel if it does not exist yet, so installers can resolve dependencies without
+    downloading whole wheels.
+    """
+    projects: Dict[str, List[Path]] = {}
+    for path in sorted(dir.iterdir()):
+        project_name = _get_project_name(path.name)
+        if project_name and path.is_file():
+            projects.setdefault(project_name, []).append(path)
+    index_dir = dir / INDEX_DIRNAME
+    index_dir.mkdir(exist_ok=True)
+    for project_name, paths in projects.items():
+        project_dir = index_dir / project_name
+        project_dir.mkdir(exist_ok=True)
+        project_dir.joinpath("index.html").write_text(
+            _make_page(
+                f"Links for {project_name}", [_make_link(path) for path in paths]
+            ),
+            encoding="utf-8",
+        )
+    index_dir.joinpath("index.html").write_text(
+        _make_page(
+            "Simple index",
+            [
+                f'<a href="{name}/">{html.escape(name)}</a><br/>'
+                for name in sorted(projects)
+            ],
+        ),
+        encoding="utf-8",
+    )
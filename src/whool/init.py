@@ -1,10 +1,10 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Sequence
-
-from manifestoo_core.addon import is_addon_dir
+from typing import Iterable, List, Sequence
 
 from .compat import tomllib
+from .utils import find_addon_dir_of, find_addon_dirs
 
 _logger = logging.getLogger(__name__)
 
@@ -35,15 +35,31 @@ def init_addon_dir(addon_dir: Path) -> bool:
     return modified
 
 
-def init(dir: Path) -> Sequence[Path]:
-    res = []
-    if is_addon_dir(dir):
-        if init_addon_dir(dir):
-            res.append(dir)
-    else:
-        for subdir in dir.iterdir():
-            if subdir.is_dir():
-                if is_addon_dir(subdir):
-                    if init_addon_dir(subdir):
-                        res.append(subdir)
-    return res
+def init_addon_dirs(addon_dirs: Sequence[Path]) -> List[Path]:
+    """Initialize addon directories concurrently. Return the modified ones."""
+    with ThreadPoolExecutor() as executor:
+        modified = list(executor.map(init_addon_dir, addon_dirs))
+    return [addon_dir for addon_dir, m in zip(addon_dirs, modified) if m]
+
+
+def init(dir: Path, max_depth: int = 1, exclude: Sequence[str] = ()) -> Sequence[Path]:
+    return init_addon_dirs(find_addon_dirs(dir, max_depth, exclude))
+
+
+def init_paths(
+    paths: Iterable[Path], max_depth: int = 1, exclude: Sequence[str] = ()
+) -> Sequence[Path]:
+    """Initialize the addons found in directories, and the addons containing files.
+
+    This lets pre-commit pass the changed files, so only the addons they belong to
+    are initialized.
+    """
+    addon_dirs = set()
+    for path in paths:
+        if path.is_dir():
+            addon_dirs.update(find_addon_dirs(path, max_depth, exclude))
+        else:
+            addon_dir = find_addon_dir_of(path)
+            if addon_dir is not None:
+                addon_dirs.add(addon_dir)
+    return init_addon_dirs(sorted(addon_dirs))
@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+from email.message import Message
+from pathlib import Path
+from typing import Any, Dict, Iterator, Sequence, Tuple, Union
+
+from .buildapi import (
+    WhoolException,
+    _get_metadata,
+    _get_metadata_index_key,
+    _get_metadata_options,
+    _serialize_metadata,
+)
+from .scm import git_head, git_uncommitted
+from .utils import find_addon_dirs
+
+_logger = logging.getLogger(__name__)
+
+# the core metadata fields that can appear several times
+MULTIPLE_USE_FIELDS = {
+    "classifier",
+    "dynamic",
+    "obsoletes_dist",
+    "platform",
+    "project_url",
+    "provides_dist",
+    "provides_extra",
+    "requires_dist",
+    "requires_external",
+    "supported_platform",
+}
+
+
+def metadata_to_json(metadata: Message) -> Dict[str, Any]:
+    """Convert core metadata to its JSON compatible form, as specified by PEP 566,
+    without the description."""
+    res: Dict[str, Any] = {}
+    for name, value in metadata.items():
+        key = name.lower().replace("-", "_")
+        if key in MULTIPLE_USE_FIELDS:
+            res.setdefault(key, []).append(value)
+        else:
+            res[key] = value
+    return res
+
+
+def iter_metadata(
+    dir: Path, post_version: bool = True, use_index: bool = True
+) -> Iterator[Tuple[Path, Union[Message, Exception]]]:
+    """Compute the metadata of dir if it is an addon, else of the addons in its
+    immediate subdirectories.
+
+    Yield the addon directory with its metadata, or with the exception raised while
+    computing it, so the other addons are still processed.
+    """
+    for addon_dir in find_addon_dirs(dir):
+        try:
+            metadata = _get_metadata(addon_dir.resolve(), post_version, use_index)
+        except Exception as e:
+            _logger.error("Failed to compute metadata of %s: %s", addon_dir, e)
+            yield addon_dir, e
+        else:
+            yield addon_dir, metadata
+
+
+def write_metadata_index(dirs: Sequence[Path], path: Path) -> bool:
+    """Compute the metadata of the addons in dirs, and write them to the metadata
+    index file at path, for use with WHOOL_METADATA_INDEX.
+
+    Each entry records the files and options the metadata was computed from, the git
+    HEAD and whether there are uncommitted changes, so it is not used once they
+    change. Return False if the metadata of some addons could not be computed; these
+    addons are not in the index.
+
+    Raise WhoolException if two addons have the same name, as entries are looked up
+    by addon name.
+    """
+    addons: Dict[str, Dict[str, Any]] = {}
+    addon_dirs: Dict[str, Path] = {}
+    ok = True
+    for dir in dirs:
+        for addon_dir, metadata in iter_metadata(dir, use_index=False):
+            if isinstance(metadata, Exception):
+                ok = False
+                continue
+            addon_dir = addon_dir.resolve()
+            if addon_dir.name in addon_dirs and addon_dirs[addon_dir.name] != addon_dir:
+                raise WhoolException(
+                    f"{addon_dirs[addon_dir.name]} and {addon_dir} have the same "
+                    "addon name"
+                )
+            addon_dirs[addon_dir.name] = addon_dir
+            head = git_head(addon_dir)
+            addons[addon_dir.name] = {
+                "key": _get_metadata_index_key(
+                    addon_dir, _get_metadata_options(addon_dir)
+                ),
+                "head": head,
+                "uncommitted": bool(head) and git_uncommitted(addon_dir),
+                "metadata": _serialize_metadata(metadata),
+            }
+    # replace the index atomically, as builds may be reading it
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump({"addons": addons}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    return ok
@@ -0,0 +1,405 @@
+import bisect
+import os
+import shutil
+import subprocess
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+GITLINK_MODE = "160000"
+# modes of the files whose blob is their content
+REGULAR_FILE_MODES = ("100644", "100755")
+# attributes that make the working tree content of a file differ from its blob
+CONVERSION_ATTRIBUTES = ("filter", "eol", "text", "working-tree-encoding")
+
+
+class IndexEntry(NamedTuple):
+    mode: str
+    sha: str
+
+
+def _git(args: List[str], cwd: Path) -> str:
+    return subprocess.check_output(
+        ["git", *args], universal_newlines=True, cwd=cwd, stderr=subprocess.DEVNULL
+    )
+
+
+def _parse_ls_files_stage(output: str) -> Dict[str, IndexEntry]:
+    res = {}
+    for line in output.split("\0"):
+        if not line:
+            continue
+        info, path = line.split("\t", 1)
+        mode, sha, _ = info.split(" ")
+        res[path] = IndexEntry(mode, sha)
+    return res
+
+
+def git_head(path: Path) -> Optional[str]:
+    """Return the sha of HEAD of the git repository containing path, or None if path
+    is not in a git repository with commits."""
+    try:
+        return _git(["rev-parse", "--verify", "-q", "HEAD"], cwd=path).strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def git_shallow_commits(path: Path) -> str:
+    """Return the commits where the history of the git repository containing path
+    is truncated, as listed in its shallow file, or an empty string if it is not a
+    shallow clone."""
+    shallow_file = _git(["rev-parse", "--git-path", "shallow"], cwd=path).strip()
+    try:
+        # relative to path, unless absolute
+        return (path / shallow_file).read_text()
+    except FileNotFoundError:
+        return ""
+
+
+def git_uncommitted(path: Path) -> bool:
+    """Return True if files in path have changes that are not staged."""
+    r = subprocess.call(
+        ["git", "diff", "--quiet", "--exit-code", "."],
+        cwd=path,
+        stderr=subprocess.DEVNULL,
+    )
+    return r != 0
+
+
+def git_changed_files(path: Path, since: str) -> Set[str]:
+    """Return the files under path, relative to path, that changed since git ref.
+
+    since is anything git diff accepts: a ref, to compare with the working tree, or
+    a range such as main...HEAD, to compare two commits.
+
+    Raise the same exceptions as git_ls_files, and subprocess.CalledProcessError if
+    since is not a valid ref or range.
+    """
+    # without rename detection, a file moved between addons changes both
+    output = _git(
+        ["diff", "--name-only", "--no-renames", "--relative", "-z", since, "--", "."],
+        path,
+    )
+    return {p for p in output.split("\0") if p}
+
+
+def git_converted_files(path: Path, names: List[str]) -> Set[str]:
+    """Return the names, relative to path, of the files whose content in the working
+    tree is converted from their git blob, by filters or end of line conversion.
+
+    Raise the same exceptions as git_ls_files.
+    """
+    try:
+        autocrlf = _git(["config", "--get", "core.autocrlf"], path).strip().lower()
+    except subprocess.CalledProcessError:
+        autocrlf = ""
+    if autocrlf in ("true", "yes", "on", "1"):
+        # any text file may be converted
+        return set(names)
+    output = subprocess.run(
+        ["git", "check-attr", "-z", "--stdin", *CONVERSION_ATTRIBUTES],
+        input="".join(name + "\0" for name in names).encode("utf-8"),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        cwd=path,
+        check=True,
+    ).stdout.decode("utf-8")
+    fields = output.split("\0")
+    return {
+        name
+        for name, value in zip(fields[0::3], fields[2::3])
+        if value not in ("unspecified", "unset")
+    }
+
+
+class GitObjectReader:
+    """Read objects from a git repository, with a single git cat-file process."""
+
+    def __init__(self, path: Path) -> None:
+        self._proc = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def read(self, sha: str) -> bytes:
+        assert self._proc.stdin and self._proc.stdout
+        self._proc.stdin.write(sha.encode("ascii") + b"\n")
+        self._proc.stdin.flush()
+        header = self._proc.stdout.readline().split()
+        if len(header) != 3:
+            raise KeyError(sha)
+        size = int(header[2])
+        data = self._proc.stdout.read(size)
+        self._proc.stdout.read(1)  # trailing LF
+        return data
+
+    def close(self) -> None:
+        assert self._proc.stdin
+        self._proc.stdin.close()
+        self._proc.wait()
+
+
+def _stat_key(path: Optional[Path]) -> Optional[Tuple[int, int, int]]:
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class GitIndex:
+    """The files in the index of a whole git repository."""
+
+    def __init__(
+        self,
+        root: Path,
+        entries: Dict[str, IndexEntry],
+        index_file: Optional[Path] = None,
+    ) -> None:
+        self.root = root
+        self.entries = entries
+        self.index_file = index_file
+        self._index_file_stat = _stat_key(index_file)
+        self._paths = sorted(entries)
+        self._gitlinks = [p for p, e in entries.items() if e.mode == GITLINK_MODE]
+        self._modified: Optional[List[str]] = None
+        self._object_reader: Optional[GitObjectReader] = None
+
+    @classmethod
+    def from_path(cls, path: Path) -> "GitIndex":
+        """Scan the index of the git repository containing path."""
+        root, git_dir = _git(
+            ["rev-parse", "--show-toplevel", "--absolute-git-dir"], cwd=path
+        ).splitlines()
+        return cls(
+            Path(root),
+            _parse_ls_files_stage(_git(["ls-files", "-z", "-s"], Path(root))),
+            Path(git_dir) / "index",
+        )
+
+    def is_stale(self) -> bool:
+        """Return True if the index file changed since it was scanned."""
+        return (
+            self.index_file is None
+            or _stat_key(self.index_file) != self._index_file_stat
+        )
+
+    def forget_working_tree(self) -> None:
+        """Forget the modified files, as the working tree may have changed."""
+        self._modified = None
+
+    def get_prefix(self, path: Path) -> Optional[str]:
+        """Return the prefix of the index paths under path, or None if path is not
+        in this repository."""
+        path = path.resolve()
+        root = self.root.resolve()
+        try:
+            rel_path = path.relative_to(root).as_posix()
+        except ValueError:
+            return None
+        prefix = "" if rel_path == "." else rel_path + "/"
+        if any(prefix.startswith(gitlink + "/") for gitlink in self._gitlinks):
+            # path is in a submodule
+            return None
+        for parent in (path, *path.parents):
+            if parent == root:
+                break
+            if parent.joinpath(".git").exists():
+                # path is in another repository nested in this one
+                return None
+        return prefix
+
+    def ls_files(self, path: Path) -> Optional[Dict[str, IndexEntry]]:
+        """Return the files under path, relative to path, or None if path is not
+        in this repository."""
+        prefix = self.get_prefix(path)
+        if prefix is None:
+            return None
+        res = {}
+        for i in range(bisect.bisect_left(self._paths, prefix), len(self._paths)):
+            p = self._paths[i]
+            if not p.startswith(prefix):
+                break
+            res[p[len(prefix) :]] = self.entries[p]
+        return res
+
+    def modified_files(self, path: Path) -> Optional[Set[str]]:
+        """Return the files under path, relative to path, that are modified or deleted
+        in the working tree, or None if path is not in this repository."""
+        prefix = self.get_prefix(path)
+        if prefix is None:
+            return None
+        if self._modified is None:
+            self._modified = _git(["ls-files", "-z", "-m"], self.root).split("\0")
+        return {p[len(prefix) :] for p in self._modified if p and p.startswith(prefix)}
+
+    def get_object_reader(self) -> GitObjectReader:
+        if self._object_reader is None:
+            self._object_reader = GitObjectReader(self.root)
+        return self._object_reader
+
+    def close(self) -> None:
+        if self._object_reader is not None:
+            self._object_reader.close()
+            self._object_reader = None
+
+
+_shared_git_indexes: Optional[List[GitIndex]] = None
+
+
+def enable_shared_git_index() -> None:
+    """Scan each git repository only once in this process, from now on."""
+    global _shared_git_indexes
+    if _shared_git_indexes is None:
+        _shared_git_indexes = []
+
+
+@contextmanager
+def shared_git_index() -> Iterator[None]:
+    """Scan each git repository only once while in this context.
+
+    This is meant for building several addons from the same checkout, during which
+    the git index is not expected to change.
+    """
+    global _shared_git_indexes
+    if _shared_git_indexes is not None:
+        # already enabled by an outer context
+        yield
+        return
+    _shared_git_indexes = []
+    try:
+        yield
+    finally:
+        for index in _shared_git_indexes:
+            index.close()
+        _shared_git_indexes = None
+
+
+def refresh_shared_git_index() -> None:
+    """Drop the shared indexes that changed, and forget the modified files of the
+    others.
+
+    This is meant for long running processes, between builds.
+    """
+    if _shared_git_indexes is None:
+        return
+    for index in list(_shared_git_indexes):
+        if index.is_stale():
+            index.close()
+            _shared_git_indexes.remove(index)
+        else:
+            index.forget_working_tree()
+
+
+def _get_shared_git_index(path: Path) -> GitIndex:
+    assert _shared_git_indexes is not None
+    for index in _shared_git_indexes:
+        if index.get_prefix(path) is not None:
+            return index
+    index = GitIndex.from_path(path)
+    _shared_git_indexes.append(index)
+    return index
+
+
+def git_ls_files(path: Path) -> Dict[str, IndexEntry]:
+    """Return the files of the git index under path, relative to path.
+
+    Raise subprocess.CalledProcessError if path is not in a git repository, and
+    FileNotFoundError if git is not installed.
+    """
+    if _shared_git_indexes is None:
+        return _parse_ls_files_stage(_git(["ls-files", "-z", "-s"], cwd=path))
+    res = _get_shared_git_index(path).ls_files(path)
+    assert res is not None
+    return res
+
+
+def git_modified_files(path: Path) -> Set[str]:
+    """Return the files of the git index under path, relative to path, that are
+    modified or deleted in the working tree.
+
+    Raise the same exceptions as git_ls_files.
+    """
+    if _shared_git_indexes is None:
+        return {p for p in _git(["ls-files", "-z", "-m"], cwd=path).split("\0") if p}
+    res = _get_shared_git_index(path).modified_files(path)
+    assert res is not None
+    return res
+
+
+class GitBlobs:
+    """Read the content of the git controlled files of a directory from the git
+    object database, when they are not modified in the working tree, and not
+    converted from their blob when checked out."""
+
+    def __init__(self, path: Path) -> None:
+        self._entries = git_ls_files(path)
+        self._modified = git_modified_files(path)
+        self._converted = git_converted_files(path, list(self._entries))
+        if _shared_git_indexes is None:
+            self._reader = GitObjectReader(path)
+            self._own_reader = True
+        else:
+            self._reader = _get_shared_git_index(path).get_object_reader()
+            self._own_reader = False
+
+    def read(self, name: str) -> Optional[Tuple[int, bytes]]:
+        """Return the file mode and content of name, or None if it must be read from
+        the working tree."""
+        entry = self._entries.get(name)
+        if entry is None or entry.mode not in REGULAR_FILE_MODES:
+            return None
+        if name in self._modified or name in self._converted:
+            return None
+        return int(entry.mode, 8), self._reader.read(entry.sha)
+
+    def close(self) -> None:
+        if self._own_reader:
+            self._reader.close()
+
+
+@contextmanager
+def git_blobs(path: Path) -> Iterator[Optional[GitBlobs]]:
+    """Provide a GitBlobs for path, or None if path is not in a git repository."""
+    try:
+        blobs = GitBlobs(path)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        yield None
+        return
+    try:
+        yield blobs
+    finally:
+        blobs.close()
+
+
+@contextmanager
+def git_checkout_at(path: Path, ref: str) -> Iterator[Path]:
+    """Check out the files under path as of git ref, and yield their location.
+
+    The files are checked out in a temporary worktree that only contains path, so
+    the cost does not depend on the size of the rest of the repository. The
+    worktree HEAD is ref, so the git history is the one of ref.
+
+    Raise subprocess.CalledProcessError if path is not in a git repository, or
+    does not exist at ref.
+    """
+    # imported here, as the build backend imports this module at startup
+    import tempfile
+
+    root = Path(_git(["rev-parse", "--show-toplevel"], cwd=path).strip())
+    prefix = path.resolve().relative_to(root.resolve()).as_posix()
+    tmp_dir = Path(tempfile.mkdtemp(prefix="whool-"))
+    worktree = tmp_dir / root.name
+    try:
+        _git(["worktree", "add", "--detach", "--no-checkout", str(worktree), ref], root)
+        try:
+            _git(["checkout", ref, "--", prefix], worktree)
+            yield worktree / prefix
+        finally:
+            _git(["worktree", "remove", "--force", str(worktree)], root)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
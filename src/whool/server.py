@@ -0,0 +1,198 @@
+import json
+import logging
+import os
+import socket
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+_logger = logging.getLogger(__name__)
+
+SOCKET_ENV_VAR = "WHOOL_SERVER_SOCKET"
+HOOKS = (
+    "build_wheel",
+    "build_sdist",
+    "build_editable",
+    "prepare_metadata_for_build_wheel",
+    "prepare_metadata_for_build_editable",
+)
+
+
+class ServerError(Exception):
+    pass
+
+
+def _check_supported() -> None:
+    if not hasattr(socket, "AF_UNIX"):
+        raise ServerError("The whool server requires Unix domain sockets")
+
+
+def get_default_socket_path() -> Path:
+    _check_supported()
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "whool.sock"
+    return Path("/tmp") / f"whool-{os.getuid()}.sock"
+
+
+def _get_request_environ() -> Dict[str, str]:
+    # the environment variables that influence builds
+    return {
+        name: value
+        for name, value in os.environ.items()
+        if (name.startswith("WHOOL_") or name == "SOURCE_DATE_EPOCH")
+        and name != SOCKET_ENV_VAR
+    }
+
+
+@contextmanager
+def _request_environ(environ: Dict[str, str]) -> Iterator[None]:
+    saved = _get_request_environ()
+    for name in saved:
+        del os.environ[name]
+    os.environ.update(environ)
+    try:
+        yield
+    finally:
+        for name in environ:
+            os.environ.pop(name, None)
+        os.environ.update(saved)
+
+
+@contextmanager
+def _cwd(path: str) -> Iterator[None]:
+    saved = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(saved)
+
+
+def _readline(sock: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b"\n"):
+            break
+    return b"".join(chunks)
+
+
+def call_server(hook: str, *args: Any) -> Optional[str]:
+    """Run a build backend hook in the server, if WHOOL_SERVER_SOCKET is set and
+    the server is reachable and runs the same whool version. Return None otherwise.
+
+    Raise ServerError if the hook fails in the server.
+    """
+    socket_path = os.getenv(SOCKET_ENV_VAR)
+    if not socket_path or not hasattr(socket, "AF_UNIX"):
+        return None
+    from .version import version as whool_version
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(socket_path)
+        except OSError as e:
+            _logger.debug("whool server not reachable at %s: %s", socket_path, e)
+            return None
+        request = {
+            "hook": hook,
+            "args": args,
+            "cwd": os.getcwd(),
+            "environ": _get_request_environ(),
+            "whool_version": whool_version,
+        }
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        response = json.loads(_readline(sock))
+    finally:
+        sock.close()
+    if "version_mismatch" in response:
+        # the frontend installed another whool version than the server runs
+        _logger.debug(
+            "whool server runs version %s, not %s",
+            response["version_mismatch"],
+            whool_version,
+        )
+        return None
+    if "error" in response:
+        raise ServerError(response["error"])
+    result: str = response["result"]
+    return result
+
+
+def _handle_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    from . import buildapi
+    from .scm import refresh_shared_git_index
+    from .version import version as whool_version
+
+    hook = request["hook"]
+    if hook not in HOOKS:
+        return {"error": f"Unknown hook {hook}"}
+    if request.get("whool_version") != whool_version:
+        return {"version_mismatch": whool_version}
+    refresh_shared_git_index()
+    start = time.perf_counter()
+    try:
+        with _request_environ(request["environ"]), _cwd(request["cwd"]):
+            result = getattr(buildapi, hook)(*request["args"])
+    except Exception as e:
+        _logger.error("%s in %s failed: %s", hook, request["cwd"], e)
+        return {"error": f"{type(e).__name__}: {e}"}
+    _logger.info(
+        "%s in %s took %.1fms",
+        hook,
+        request["cwd"],
+        (time.perf_counter() - start) * 1000,
+    )
+    return {"result": result}
+
+
+def serve(socket_path: Path) -> None:
+    """Serve build backend hooks on socket_path, until interrupted.
+
+    Hooks called with WHOOL_SERVER_SOCKET set to socket_path are forwarded to this
+    process, which keeps modules imported and git indexes scanned between builds.
+    Requests are handled one at a time, as each one changes the current directory
+    and the environment of the process.
+    """
+    import socketserver
+
+    _check_supported()
+
+    from .scm import enable_shared_git_index
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            request = json.loads(self.rfile.readline())
+            response = _handle_request(request)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+    # the hooks must run here, not be forwarded again
+    os.environ.pop(SOCKET_ENV_VAR, None)
+    enable_shared_git_index()
+    if socket_path.is_socket():
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            # left by a previous server that did not exit cleanly
+            socket_path.unlink()
+        else:
+            raise ServerError(f"A whool server is already running on {socket_path}")
+        finally:
+            sock.close()
+    old_umask = os.umask(0o077)
+    try:
+        server = socketserver.UnixStreamServer(str(socket_path), Handler)
+    finally:
+        os.umask(old_umask)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        socket_path.unlink()
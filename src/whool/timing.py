@@ -0,0 +1,89 @@
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+_logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Time a build phase.
+
+    The duration is logged at debug level, and appended as a JSON line to the file
+    named by the WHOOL_TRACE_FILE environment variable, if set. The yielded dict can
+    be used to add attributes to the record.
+    """
+    start = time.time()
+    start_counter = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        duration = time.perf_counter() - start_counter
+        _logger.debug("%s took %.1fms %s", name, duration * 1000, attrs)
+        trace_file = os.getenv("WHOOL_TRACE_FILE")
+        if trace_file:
+            record = {
+                "name": name,
+                "start": start,
+                "duration": duration,
+                "pid": os.getpid(),
+                **attrs,
+            }
+            line = json.dumps(record, default=str) + "\n"
+            # a single append of a short line, so concurrent processes don't mix
+            with open(trace_file, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+def read_trace(path: Path, offset: int = 0) -> List[Dict[str, Any]]:
+    """Read the records of a trace file, starting at offset."""
+    with open(path, encoding="utf-8") as f:
+        f.seek(offset)
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def format_profile(records: List[Dict[str, Any]]) -> str:
+    """Summarize trace records by phase, in order of total duration."""
+    durations: Dict[str, List[float]] = defaultdict(list)
+    for record in records:
+        durations[record["name"]].append(record["duration"])
+    lines = [f"{'phase':<20} {'count':>6} {'total (s)':>10} {'mean (ms)':>10}"]
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        lines.append(
+            f"{name:<20} {len(values):>6} {sum(values):>10.3f} "
+            f"{sum(values) / len(values) * 1000:>10.1f}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def collect_trace() -> Iterator[List[Dict[str, Any]]]:
+    """Collect the records of the spans completed in this context, including in
+    subprocesses, into the yielded list."""
+    import tempfile
+
+    records: List[Dict[str, Any]] = []
+    trace_file = os.getenv("WHOOL_TRACE_FILE")
+    if trace_file:
+        try:
+            offset = os.path.getsize(trace_file)
+        except OSError:
+            offset = 0
+        yield records
+        if os.path.exists(trace_file):
+            records.extend(read_trace(Path(trace_file), offset))
+        return
+    fd, tmp_name = tempfile.mkstemp(prefix="whool-trace-", suffix=".jsonl")
+    os.close(fd)
+    os.environ["WHOOL_TRACE_FILE"] = tmp_name
+    try:
+        yield records
+        records.extend(read_trace(Path(tmp_name)))
+    finally:
+        del os.environ["WHOOL_TRACE_FILE"]
+        os.unlink(tmp_name)
@@ -1,5 +1,6 @@
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Sequence
 
 from .compat import tomllib
 
@@ -10,3 +11,58 @@ def load_pyproject_toml(addon_dir: Path) -> Dict[str, Any]:
         with open(pyproject_toml_path, "rb") as f:
             return tomllib.load(f)
     return {}
+
+
+def _is_excluded(dir: Path, root: Path, exclude: Sequence[str]) -> bool:
+    rel_path = dir.relative_to(root).as_posix()
+    return any(
+        fnmatch(dir.name, pattern) or fnmatch(rel_path, pattern) for pattern in exclude
+    )
+
+
+def find_addon_dirs(
+    dir: Path, max_depth: int = 1, exclude: Sequence[str] = ()
+) -> List[Path]:
+    """Return dir if it is an addon, else the addons in its subdirectories, up to
+    max_depth levels deep.
+
+    Addons, hidden directories and directories matching one of the exclude glob
+    patterns (by name or by path relative to dir) are not searched.
+    """
+    # imported here as the build backend only needs load_pyproject_toml
+    from concurrent.futures import ThreadPoolExecutor
+
+    from manifestoo_core.addon import is_addon_dir
+
+    if is_addon_dir(dir):
+        return [dir]
+    res = []
+    parents = [dir]
+    with ThreadPoolExecutor() as executor:
+        for _ in range(max_depth):
+            subdirs = [
+                subdir
+                for parent in parents
+                for subdir in parent.iterdir()
+                if subdir.is_dir()
+                and not subdir.name.startswith(".")
+                and not _is_excluded(subdir, dir, exclude)
+            ]
+            parents = []
+            # detecting manifests is I/O bound, so do it concurrently
+            for subdir, is_addon in zip(subdirs, executor.map(is_addon_dir, subdirs)):
+                if is_addon:
+                    res.append(subdir)
+                else:
+                    parents.append(subdir)
+    return sorted(res)
+
+
+def find_addon_dir_of(path: Path) -> Optional[Path]:
+    """Return the addon directory containing path, if any."""
+    from manifestoo_core.addon import is_addon_dir
+
+    for parent in path.absolute().parents:
+        if is_addon_dir(parent):
+            return parent
+    return None
@@ -0,0 +1,188 @@
+import base64
+import csv
+import hashlib
+import io
+import os
+import stat
+import time
+import zipfile
+import zlib
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Collection, List, NamedTuple, Optional, Tuple, Type, Union
+
+from .compress import OrderedThreadPool
+
+BUFSIZE = 1024 * 1024
+# files smaller than this are compressed in the calling thread, as handing them to
+# a thread would cost more than it saves
+THREADED_FILE_SIZE = 64 * 1024
+# files larger than this are streamed, instead of being compressed in memory
+LARGE_FILE_SIZE = 32 * 1024 * 1024
+# the earliest date a zip file can represent
+ZIP_EPOCH = 315532800
+
+
+def _zip_date_time() -> Tuple[int, int, int, int, int, int]:
+    # Wheels must be reproducible, so the timestamps don't come from the files but
+    # from SOURCE_DATE_EPOCH, or the earliest possible date.
+    source_date_epoch = int(os.getenv("SOURCE_DATE_EPOCH") or ZIP_EPOCH)
+    return time.gmtime(max(source_date_epoch, ZIP_EPOCH))[:6]
+
+
+def _record_hash(digest: bytes) -> str:
+    return "sha256=" + base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+class _Member(NamedTuple):
+    zinfo: zipfile.ZipInfo
+    data: bytes
+    crc: int
+    size: int
+    record_hash: str
+
+
+def _compress_member(
+    zinfo: zipfile.ZipInfo, data: Union[bytes, Path], level: int
+) -> _Member:
+    if isinstance(data, Path):
+        data = data.read_bytes()
+    if zinfo.compress_type == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        compressed = compressor.compress(data) + compressor.flush()
+    else:
+        compressed = data
+    return _Member(
+        zinfo,
+        compressed,
+        zlib.crc32(data),
+        len(data),
+        _record_hash(hashlib.sha256(data).digest()),
+    )
+
+
+class WheelWriter:
+    """Write a wheel archive, computing its RECORD while members are added.
+
+    Members are hashed and compressed in a single pass as they are written, so no
+    staging directory is needed. The RECORD file is written when the writer is closed.
+
+    Members are compressed with compression_level, except those with a file name
+    extension in uncompressed_extensions, which are stored. With more than one
+    thread, members are compressed concurrently and written in order, so the
+    resulting archive does not depend on the number of threads.
+    """
+
+    def __init__(
+        self,
+        file: Union[Path, IO[bytes]],
+        dist_info_dirname: str,
+        compression_level: int = zlib.Z_DEFAULT_COMPRESSION,
+        uncompressed_extensions: Collection[str] = (),
+        threads: int = 1,
+    ) -> None:
+        self._zf = zipfile.ZipFile(file, "w", compression=zipfile.ZIP_DEFLATED)
+        self._dist_info_dirname = dist_info_dirname
+        self._date_time = _zip_date_time()
+        self._compression_level = compression_level
+        self._uncompressed_extensions = {ext.lower() for ext in uncompressed_extensions}
+        self._records: List[Tuple[str, str, int]] = []
+        self._pool: OrderedThreadPool[_Member] = OrderedThreadPool(
+            threads, self._write_member
+        )
+
+    def _zipinfo(self, arcname: str, mode: int) -> zipfile.ZipInfo:
+        zinfo = zipfile.ZipInfo(arcname, self._date_time)
+        # only keep the executable bit, like git
+        mode = 0o755 if mode & 0o111 else 0o644
+        zinfo.external_attr = (stat.S_IFREG | mode) << 16
+        if os.path.splitext(arcname)[1].lower() in self._uncompressed_extensions:
+            zinfo.compress_type = zipfile.ZIP_STORED
+        else:
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+        return zinfo
+
+    def _write_member(self, member: _Member) -> None:
+        zinfo = member.zinfo
+        zinfo.CRC = member.crc
+        zinfo.file_size = member.size
+        zinfo.compress_size = len(member.data)
+        # The member is already compressed, so write it like ZipFile.writestr would
+        # do, without compressing it again.
+        fp = self._zf.fp
+        assert fp is not None
+        zinfo.header_offset = fp.tell()
+        fp.write(zinfo.FileHeader())
+        fp.write(member.data)
+        self._zf.filelist.append(zinfo)
+        self._zf.NameToInfo[zinfo.filename] = zinfo
+        self._zf.start_dir = fp.tell()
+        self._records.append((zinfo.filename, member.record_hash, member.size))
+
+    def write_file(self, arcname: str, path: Path) -> None:
+        st = path.stat()
+        zinfo = self._zipinfo(arcname, st.st_mode)
+        if st.st_size <= LARGE_FILE_SIZE:
+            self._pool.submit(
+                _compress_member,
+                zinfo,
+                path,
+                self._compression_level,
+                inline=st.st_size < THREADED_FILE_SIZE,
+            )
+            return
+        self._pool.flush()
+        zinfo.file_size = st.st_size
+        zinfo._compresslevel = self._compression_level  # type: ignore[attr-defined]
+        sha256 = hashlib.sha256()
+        size = 0
+        with path.open("rb") as src, self._zf.open(zinfo, "w") as dst:
+            while True:
+                buf = src.read(BUFSIZE)
+                if not buf:
+                    break
+                sha256.update(buf)
+                dst.write(buf)
+                size += len(buf)
+        self._records.append((arcname, _record_hash(sha256.digest()), size))
+
+    def write_bytes(self, arcname: str, data: bytes, mode: int = 0o644) -> None:
+        self._pool.submit(
+            _compress_member,
+            self._zipinfo(arcname, mode),
+            data,
+            self._compression_level,
+            inline=len(data) < THREADED_FILE_SIZE,
+        )
+
+    def close(self) -> None:
+        self._pool.close()
+        record_arcname = self._dist_info_dirname + "/RECORD"
+        record = io.StringIO()
+        # RECORD is a CSV file, so file names with commas or quotes must be quoted
+        writer = csv.writer(record, lineterminator="\n")
+        writer.writerows(self._records)
+        writer.writerow((record_arcname, "", ""))
+        self._write_member(
+            _compress_member(
+                self._zipinfo(record_arcname, 0o644),
+                record.getvalue().encode("utf-8"),
+                self._compression_level,
+            )
+        )
+        self._zf.close()
+
+    def __enter__(self) -> "WheelWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._pool.shutdown()
+            self._zf.close()
@@ -6,6 +6,17 @@ import pytest
 from whool.init import init_addon_dir
 
 
+@pytest.fixture(autouse=True)
+def whool_cache_dir(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    """Use an empty whool cache for each test."""
+    cache_dir = tmp_path_factory.mktemp("whool-cache")
+    monkeypatch.setenv("WHOOL_CACHE_DIR", str(cache_dir))
+    monkeypatch.delenv("WHOOL_NO_CACHE", raising=False)
+    return cache_dir
+
+
 @pytest.fixture
 def addon1(tmp_path: Path) -> Path:
     addon_name = "Addon1"
@@ -40,3 +51,27 @@ def addon1_with_pyproject(addon1: Path) -> Path:
     subprocess.check_call(["git", "add", "."], cwd=addon1)
     subprocess.check_call(["git", "commit", "-m", "one more commit"], cwd=addon1)
     return addon1
+
+
+@pytest.fixture
+def addons_repo(tmp_path: Path) -> Path:
+    repo_dir = tmp_path / "repo"
+    repo_dir.mkdir()
+    subprocess.check_call(["git", "init"], cwd=repo_dir)
+    subprocess.check_call(
+        ["git", "config", "user.email", "test@example.com"], cwd=repo_dir
+    )
+    subprocess.check_call(["git", "config", "user.name", "test"], cwd=repo_dir)
+    for addon_name in ("addon_a", "addon_b"):
+        addon_dir = repo_dir / addon_name
+        addon_dir.mkdir()
+        addon_dir.joinpath("__manifest__.py").write_text(
+            f"{{'name': '{addon_name}', 'version': '16.0.1.0.0'}}"
+        )
+        addon_dir.joinpath("__init__.py").touch()
+        init_addon_dir(addon_dir)
+    repo_dir.joinpath("setup").mkdir()
+    repo_dir.joinpath("setup", "README").touch()
+    subprocess.check_call(["git", "add", "."], cwd=repo_dir)
+    subprocess.check_call(["git", "commit", "-m", "initial commit"], cwd=repo_dir)
+    return repo_dir
@@ -0,0 +1,252 @@
+import io
+import logging
+import subprocess
+import tarfile
+from pathlib import Path
+from typing import IO, Any, cast
+from zipfile import ZipFile
+
+import pytest
+
+from whool.build import build, write_sdist, write_wheel
+from whool.buildapi import WhoolException
+from whool.cli import main
+
+from .utils import dir_changer
+
+
+def test_build_addons_dir(addons_repo: Path, tmp_path: Path) -> None:
+    outdir = tmp_path / "dist"
+    assert build(addons_repo, outdir) == [
+        "odoo_addon_addon_a-16.0.1.0.0.tar.gz",
+        "odoo_addon_addon_a-16.0.1.0.0-py3-none-any.whl",
+        "odoo_addon_addon_b-16.0.1.0.0.tar.gz",
+        "odoo_addon_addon_b-16.0.1.0.0-py3-none-any.whl",
+    ]
+    assert sorted(p.name for p in outdir.iterdir()) == [
+        "odoo_addon_addon_a-16.0.1.0.0-py3-none-any.whl",
+        "odoo_addon_addon_a-16.0.1.0.0.tar.gz",
+        "odoo_addon_addon_b-16.0.1.0.0-py3-none-any.whl",
+        "odoo_addon_addon_b-16.0.1.0.0.tar.gz",
+    ]
+
+
+def test_build_addon_dir(addon1: Path, tmp_path: Path) -> None:
+    assert build(addon1, tmp_path / "dist", sdist=False) == [
+        "odoo_addon_addon1-15.0.1.0.0.1-py3-none-any.whl",
+    ]
+
+
+def test_build_cli(addons_repo: Path) -> None:
+    with dir_changer(addons_repo):
+        assert main(["build", "--wheel"]) == 0
+    assert sorted(p.name for p in (addons_repo / "dist").iterdir()) == [
+        "odoo_addon_addon_a-16.0.1.0.0-py3-none-any.whl",
+        "odoo_addon_addon_b-16.0.1.0.0-py3-none-any.whl",
+    ]
+
+
+def test_build_cli_outdir(addon1: Path, tmp_path: Path) -> None:
+    outdir = tmp_path / "out"
+    assert main(["build", "--sdist", "-o", str(outdir), str(addon1)]) == 0
+    assert [p.name for p in outdir.iterdir()] == [
+        "odoo_addon_addon1-15.0.1.0.0.1.tar.gz"
+    ]
+
+
+def test_build_jobs(addons_repo: Path, tmp_path: Path) -> None:
+    assert build(addons_repo, tmp_path / "dist", sdist=False, jobs=2) == [
+        "odoo_addon_addon_a-16.0.1.0.0-py3-none-any.whl",
+        "odoo_addon_addon_b-16.0.1.0.0-py3-none-any.whl",
+    ]
+
+
+def test_build_invalid_jobs(
+    addons_repo: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    with pytest.raises(WhoolException, match="Invalid number of jobs"):
+        build(addons_repo, tmp_path / "dist", jobs=-1)
+    assert main(["build", "-j", "-2", "-o", str(tmp_path), str(addons_repo)]) == 1
+    assert capsys.readouterr().err == "Invalid number of jobs: -2\n"
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_build_failure(
+    addons_repo: Path,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    jobs: int,
+) -> None:
+    addons_repo.joinpath("addon_a", "__manifest__.py").write_text(
+        "{'name': 'addon_a', 'version': '1.0.0'}"
+    )
+    outdir = tmp_path / "dist"
+    assert main(["build", "-j", str(jobs), "-o", str(outdir), str(addons_repo)]) == 1
+    # other addons are still built
+    assert sorted(p.name for p in outdir.iterdir()) == [
+        "odoo_addon_addon_b-16.0.1.0.0-py3-none-any.whl",
+        "odoo_addon_addon_b-16.0.1.0.0.tar.gz",
+    ]
+    captured = capsys.readouterr()
+    assert captured.err.startswith(
+        f"Failed to build {addons_repo.resolve() / 'addon_a'}: "
+    )
+
+
+def _commit_new_version(addons_repo: Path) -> None:
+    subprocess.check_call(["git", "tag", "v1"], cwd=addons_repo)
+    addons_repo.joinpath("addon_a", "__manifest__.py").write_text(
+        "{'name': 'addon_a', 'version': '16.0.1.1.0'}"
+    )
+    addons_repo.joinpath("addon_a", "new.py").touch()
+    subprocess.check_call(["git", "add", "."], cwd=addons_repo)
+    subprocess.check_call(["git", "commit", "-m", "new version"], cwd=addons_repo)
+
+
+def test_build_ref(addons_repo: Path, tmp_path: Path) -> None:
+    _commit_new_version(addons_repo)
+    # uncommitted changes are ignored too
+    addons_repo.joinpath("addon_a", "__init__.py").write_text("# modified")
+    assert build(addons_repo / "addon_a", tmp_path, ref="v1") == [
+        "odoo_addon_addon_a-16.0.1.0.0.tar.gz",
+        "odoo_addon_addon_a-16.0.1.0.0-py3-none-any.whl",
+    ]
+    with ZipFile(tmp_path / "odoo_addon_addon_a-16.0.1.0.0-py3-none-any.whl") as zf:
+        assert "odoo/addons/addon_a/new.py" not in zf.namelist()
+        assert zf.read("odoo/addons/addon_a/__init__.py") == b""
+    assert build(addons_repo, tmp_path / "all", wheel=True, sdist=False, ref="v1") == [
+        "odoo_addon_addon_a-16.0.1.0.0-py3-none-any.whl",
+        "odoo_addon_addon_b-16.0.1.0.0-py3-none-any.whl",
+    ]
+    # the temporary worktree is removed
+    worktrees = subprocess.check_output(
+        ["git", "worktree", "list", "--porcelain"],
+        cwd=addons_repo,
+        universal_newlines=True,
+    )
+    assert worktrees.count("worktree ") == 1
+
+
+def test_build_ref_post_version(addons_repo: Path, tmp_path: Path) -> None:
+    _commit_new_version(addons_repo)
+    addons_repo.joinpath("addon_a", "new.py").write_text("# changed")
+    subprocess.check_call(["git", "commit", "-am", "change"], cwd=addons_repo)
+    assert build(
+        addons_repo / "addon_a", tmp_path, wheel=True, sdist=False, ref="HEAD"
+    ) == ["odoo_addon_addon_a-16.0.1.1.0.1-py3-none-any.whl"]
+
+
+def test_build_ref_unknown(addons_repo: Path, tmp_path: Path) -> None:
+    with pytest.raises(WhoolException, match="at nope"):
+        build(addons_repo / "addon_a", tmp_path, ref="nope")
+    assert main(["build", "--ref", "nope", str(addons_repo)]) == 1
+
+
+def test_build_changed_since(
+    addons_repo: Path, tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    caplog.set_level(logging.INFO)
+    _commit_new_version(addons_repo)
+    assert build(addons_repo, tmp_path, sdist=False, changed_since="v1") == [
+        "odoo_addon_addon_a-16.0.1.1.0-py3-none-any.whl",
+    ]
+    assert "Skipped addon_b, unchanged since v1" in caplog.text
+    assert build(addons_repo, tmp_path, sdist=False, changed_since="HEAD") == []
+    # uncommitted changes are compared with a single ref
+    addons_repo.joinpath("addon_b", "__init__.py").write_text("# modified")
+    assert build(addons_repo, tmp_path, sdist=False, changed_since="HEAD") == [
+        "odoo_addon_addon_b-16.0.1.0.0.1-py3-none-any.whl",
+    ]
+    # but not with a range
+    assert build(addons_repo, tmp_path, sdist=False, changed_since="v1..HEAD") == [
+        "odoo_addon_addon_a-16.0.1.1.0-py3-none-any.whl",
+    ]
+    assert build(addons_repo / "addon_a", tmp_path, changed_since="HEAD") == []
+
+
+def test_build_changed_since_unknown(addons_repo: Path, tmp_path: Path) -> None:
+    with pytest.raises(WhoolException, match="since nope"):
+        build(addons_repo, tmp_path, changed_since="nope")
+    assert main(["build", "--changed-since", "nope", str(addons_repo)]) == 1
+
+
+class _Pipe(io.RawIOBase):
+    """A stream that can't seek nor tell, like a pipe."""
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: Any) -> int:
+        self.data += b
+        return len(b)
+
+
+def test_write_wheel(addon1: Path, tmp_path: Path) -> None:
+    pipe = _Pipe()
+    wheel_name = write_wheel(addon1, cast("IO[bytes]", pipe))
+    assert wheel_name == "odoo_addon_addon1-15.0.1.0.0.1-py3-none-any.whl"
+    assert build(addon1, tmp_path, sdist=False) == [wheel_name]
+    assert bytes(pipe.data) == tmp_path.joinpath(wheel_name).read_bytes()
+
+
+def test_write_sdist(addon1: Path) -> None:
+    pipe = _Pipe()
+    sdist_name = write_sdist(addon1, cast("IO[bytes]", pipe))
+    assert sdist_name == "odoo_addon_addon1-15.0.1.0.0.1.tar.gz"
+    with tarfile.open(fileobj=io.BytesIO(pipe.data)) as tf:
+        assert "odoo_addon_addon1-15.0.1.0.0.1/PKG-INFO" in tf.getnames()
+
+
+def test_build_cli_stdout(
+    addon1: Path, capsysbinary: pytest.CaptureFixture[bytes]
+) -> None:
+    assert main(["build", "--wheel", "--outdir", "-", str(addon1)]) == 0
+    with ZipFile(io.BytesIO(capsysbinary.readouterr().out)) as zf:
+        assert "odoo/addons/Addon1/__manifest__.py" in zf.namelist()
+    assert not addon1.joinpath("dist").exists()
+    assert main(["build", "--outdir", "-", str(addon1)]) == 1
+    assert b"requires one of --wheel or --sdist" in capsysbinary.readouterr().err
+
+
+def test_build_changed_since_moved_file(addons_repo: Path, tmp_path: Path) -> None:
+    addons_repo.joinpath("addon_b", "data.py").write_text("# some data\n" * 20)
+    subprocess.check_call(["git", "add", "."], cwd=addons_repo)
+    subprocess.check_call(["git", "commit", "-m", "add data"], cwd=addons_repo)
+    subprocess.check_call(["git", "tag", "v2"], cwd=addons_repo)
+    subprocess.check_call(
+        ["git", "mv", "addon_b/data.py", "addon_a/data.py"], cwd=addons_repo
+    )
+    subprocess.check_call(["git", "commit", "-m", "move data"], cwd=addons_repo)
+    # both the addon that lost the file and the one that got it are built
+    assert build(addons_repo, tmp_path, sdist=False, changed_since="v2..HEAD") == [
+        "odoo_addon_addon_a-16.0.1.0.0.1-py3-none-any.whl",
+        "odoo_addon_addon_b-16.0.1.0.0.2-py3-none-any.whl",
+    ]
+
+
+def test_build_cli_without_scm(tmp_path: Path) -> None:
+    addon_dir = tmp_path / "addon_c"
+    addon_dir.mkdir()
+    addon_dir.joinpath("__manifest__.py").write_text(
+        "{'name': 'addon_c', 'version': '16.0.1.0.0'}"
+    )
+    addon_dir.joinpath("__init__.py").touch()
+    with dir_changer(addon_dir):
+        # twice, so the second build sees the distributions of the first one
+        assert main(["build"]) == 0
+        assert main(["build"]) == 0
+    dist_dir = addon_dir / "dist"
+    with ZipFile(dist_dir / "odoo_addon_addon_c-16.0.1.0.0-py3-none-any.whl") as zf:
+        assert [n for n in zf.namelist() if n.startswith("odoo/")] == [
+            "odoo/addons/addon_c/__init__.py",
+            "odoo/addons/addon_c/__manifest__.py",
+        ]
+    with tarfile.open(dist_dir / "odoo_addon_addon_c-16.0.1.0.0.tar.gz") as tf:
+        assert sorted(tf.getnames()) == [
+            "odoo_addon_addon_c-16.0.1.0.0/PKG-INFO",
+            "odoo_addon_addon_c-16.0.1.0.0/__init__.py",
+            "odoo_addon_addon_c-16.0.1.0.0/__manifest__.py",
+        ]
@@ -1,7 +1,12 @@
 import os
+import shutil
 from pathlib import Path
+from typing import Any
 from zipfile import ZipFile
 
+import pytest
+
+from whool import wheelfile
 from whool.buildapi import build_editable
 
 from .utils import dir_changer
@@ -28,3 +33,83 @@ def test_build_editable(addon1_with_pyproject: Path, tmp_path: Path) -> None:
             assert zf.open("odoo_addon_addon1.pth", "r").read().decode("utf-8") == str(
                 editable_dir.resolve()
             )
+
+
+def test_build_editable_incremental(
+    addon1_with_pyproject: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    wheel_dir1 = tmp_path / "1"
+    wheel_dir1.mkdir()
+    wheel_dir2 = tmp_path / "2"
+    wheel_dir2.mkdir()
+    with dir_changer(addon1_with_pyproject):
+        wheel_name = build_editable(os.fspath(wheel_dir1))
+        editable_addon_symlink = (
+            addon1_with_pyproject / "build" / "__editable__" / "odoo" / "addons"
+        ).joinpath("Addon1")
+        symlink_stat = os.lstat(editable_addon_symlink)
+        # nothing changed, the editable wheel and directory are reused
+        with monkeypatch.context() as m:
+            m.setattr(wheelfile, "WheelWriter", None)
+            assert build_editable(os.fspath(wheel_dir2)) == wheel_name
+        assert os.lstat(editable_addon_symlink) == symlink_stat
+        assert (wheel_dir2 / wheel_name).read_bytes() == (
+            wheel_dir1 / wheel_name
+        ).read_bytes()
+        # the version changes, a new editable wheel is built
+        addon1_with_pyproject.joinpath("__manifest__.py").write_text(
+            "{'name': 'addon1', 'version': '15.0.1.2.0'}"
+        )
+        wheel_name2 = build_editable(os.fspath(wheel_dir2))
+        assert wheel_name2 == "odoo_addon_addon1-15.0.1.2.0.dev1-py3-none-any.whl"
+        with ZipFile(wheel_dir2 / wheel_name2) as zf:
+            assert "odoo_addon_addon1.pth" in zf.namelist()
+
+
+def test_build_editable_no_cache(
+    addon1_with_pyproject: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("WHOOL_NO_CACHE", "1")
+    with dir_changer(addon1_with_pyproject):
+        wheel_name = build_editable(os.fspath(tmp_path))
+        assert not addon1_with_pyproject.joinpath(
+            "build", "__editable_wheel__"
+        ).exists()
+        written = []
+        orig_wheel_writer = wheelfile.WheelWriter
+
+        def wheel_writer(*args: Any, **kwargs: Any) -> wheelfile.WheelWriter:
+            written.append(args)
+            return orig_wheel_writer(*args, **kwargs)
+
+        monkeypatch.setattr(wheelfile, "WheelWriter", wheel_writer)
+        assert build_editable(os.fspath(tmp_path)) == wheel_name
+    assert len(written) == 1
+
+
+def test_build_editable_shared_dir(
+    addons_repo: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    shared_dir = tmp_path / "editable"
+    monkeypatch.setenv("WHOOL_EDITABLE_DIR", os.fspath(shared_dir))
+    pth_contents = []
+    for addon_name in ("addon_a", "addon_b"):
+        with dir_changer(addons_repo / addon_name):
+            wheel_name = build_editable(os.fspath(tmp_path))
+        with ZipFile(tmp_path / wheel_name) as zf:
+            pth_contents.append(zf.read(f"odoo_addon_{addon_name}.pth"))
+        assert not addons_repo.joinpath(addon_name, "build", "__editable__").exists()
+    # all addons are in the same sys.path entry
+    assert pth_contents == [os.fsencode(shared_dir.resolve())] * 2
+    addons_dir = shared_dir / "odoo" / "addons"
+    assert sorted(os.listdir(addons_dir)) == ["addon_a", "addon_b"]
+    assert addons_dir.joinpath("addon_a").resolve() == (
+        addons_repo.joinpath("addon_a").resolve()
+    )
+    # an addon moved to another checkout is relinked
+    other_addon_a = tmp_path / "other" / "addon_a"
+    shutil.copytree(addons_repo / "addon_a", other_addon_a)
+    with dir_changer(other_addon_a):
+        build_editable(os.fspath(tmp_path))
+    assert addons_dir.joinpath("addon_a").resolve() == other_addon_a.resolve()
+    assert sorted(os.listdir(addons_dir)) == ["addon_a", "addon_b"]
@@ -1,7 +1,10 @@
 import os
+import subprocess
 from pathlib import Path
 from tarfile import TarFile
 
+import pytest
+
 from whool.buildapi import _build_sdist, build_sdist
 
 from .utils import dir_changer
@@ -14,6 +17,21 @@ def test_build_sdist(addon1: Path, tmp_path: Path) -> None:
         assert (tmp_path / sdist_name).exists()
 
 
+def test_build_sdist_source_date_epoch(
+    addon1: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1600000000")
+    (tmp_path / "1").mkdir()
+    (tmp_path / "2").mkdir()
+    sdist_name = _build_sdist(addon1, tmp_path / "1")
+    os.utime(addon1 / "hook.py", (1700000000, 1700000000))
+    assert _build_sdist(addon1, tmp_path / "2") == sdist_name
+    sdist = tmp_path.joinpath("1", sdist_name).read_bytes()
+    assert sdist == tmp_path.joinpath("2", sdist_name).read_bytes()
+    with TarFile.open(tmp_path / "1" / sdist_name, mode="r:gz") as tf:
+        assert {m.mtime for m in tf.getmembers()} == {1600000000}
+
+
 def test_build_sdist_from_sdist(addon1_with_pyproject: Path, tmp_path: Path) -> None:
     sdist_name = _build_sdist(addon1_with_pyproject, tmp_path)
     assert sdist_name == "odoo_addon_addon1-15.0.1.1.0.1.tar.gz"
@@ -40,3 +58,42 @@ def test_build_sdist_from_sdist(addon1_with_pyproject: Path, tmp_path: Path) ->
     assert (tmp_path2 / "odoo_addon_addon1-15.0.1.1.0.1" / "PKG-INFO").read_bytes() == (
         tmp_path3 / "odoo_addon_addon1-15.0.1.1.0.1" / "PKG-INFO"
     ).read_bytes()
+
+
+def test_build_sdist_scm_files_only(addon1: Path, tmp_path: Path) -> None:
+    addon1.joinpath("untracked.py").touch()
+    sdist_name = _build_sdist(addon1, tmp_path)
+    with TarFile.open(tmp_path / sdist_name, mode="r:gz") as tf:
+        names = sorted(tf.getnames())
+        pkg_info = tf.extractfile("odoo_addon_addon1-15.0.1.0.0.1/PKG-INFO")
+        assert pkg_info is not None
+        assert b"Version: 15.0.1.0.0.1\n" in pkg_info.read()
+    assert names == [
+        "odoo_addon_addon1-15.0.1.0.0.1/PKG-INFO",
+        "odoo_addon_addon1-15.0.1.0.0.1/__init__.py",
+        "odoo_addon_addon1-15.0.1.0.0.1/__manifest__.py",
+        "odoo_addon_addon1-15.0.1.0.0.1/hook.py",
+    ]
+
+
+def test_build_sdist_read_git_objects(
+    addon1: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("WHOOL_READ_GIT_OBJECTS", "1")
+    addon1.joinpath("hook.py").write_text("# modified")
+    # set the mode in git only, ignoring the working tree mode as on Windows,
+    # where chmod does not work
+    subprocess.check_call(["git", "config", "core.fileMode", "false"], cwd=addon1)
+    subprocess.check_call(
+        ["git", "update-index", "--chmod=+x", "__init__.py"], cwd=addon1
+    )
+    sdist_name = _build_sdist(addon1, tmp_path)
+    with TarFile.open(tmp_path / sdist_name, mode="r:gz") as tf:
+        root = sdist_name[: -len(".tar.gz")]
+        hook = tf.extractfile(f"{root}/hook.py")
+        assert hook is not None
+        assert hook.read() == b"# modified"
+        manifest = tf.extractfile(f"{root}/__manifest__.py")
+        assert manifest is not None
+        assert manifest.read() == addon1.joinpath("__manifest__.py").read_bytes()
+        assert tf.getmember(f"{root}/__init__.py").mode == 0o755
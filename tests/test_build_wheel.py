@@ -1,14 +1,26 @@
+import base64
+import csv
+import hashlib
 import os
+import subprocess
 from pathlib import Path
-from zipfile import ZipFile
+from tarfile import TarFile
+from zipfile import ZIP_STORED, ZipFile
 
+import manifestoo_core.metadata
 import pytest
 from manifestoo_core.git_postversion import POST_VERSION_STRATEGY_NONE
 
-from whool.buildapi import build_wheel
+from whool import buildapi
+from whool.buildapi import (
+    WhoolException,
+    build_wheel,
+    prepare_metadata_for_build_wheel,
+)
 from whool.init import init_addon_dir
+from whool.wheelfile import WheelWriter
 
-from .utils import dir_changer
+from .utils import dir_changer, no_metadata_from_addon_dir
 
 
 def test_build_wheel(addon1_with_pyproject: Path, tmp_path: Path) -> None:
@@ -22,6 +34,32 @@ def test_build_wheel(addon1_with_pyproject: Path, tmp_path: Path) -> None:
             assert "odoo/addons/Addon1/pyproject.toml" not in names
 
 
+def test_build_wheel_record(addon1_with_pyproject: Path, tmp_path: Path) -> None:
+    addon1_with_pyproject.joinpath("a,b.txt").write_text("data")
+    subprocess.check_call(["git", "add", "."], cwd=addon1_with_pyproject)
+    with dir_changer(addon1_with_pyproject):
+        wheel_name = build_wheel(os.fspath(tmp_path))
+    with ZipFile(tmp_path / wheel_name) as zf:
+        names = zf.namelist()
+        dist_info_dir = "odoo_addon_addon1-15.0.1.1.0.1.dist-info"
+        # dist-info is at the end of the archive, RECORD last
+        assert names[-1] == f"{dist_info_dir}/RECORD"
+        assert all(n.startswith(dist_info_dir) for n in names[-4:])
+        record = list(
+            csv.reader(zf.read(f"{dist_info_dir}/RECORD").decode("utf-8").splitlines())
+        )
+        assert len(record) == len(names)
+        assert "odoo/addons/Addon1/a,b.txt" in [name for name, _, _ in record]
+        for name, h, size in record:
+            if name == f"{dist_info_dir}/RECORD":
+                assert h == size == ""
+                continue
+            data = zf.read(name)
+            digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest())
+            assert h == "sha256=" + digest.rstrip(b"=").decode()
+            assert int(size) == len(data)
+
+
 def test_build_wheel_without_scm(tmp_path: Path) -> None:
     addon_dir = tmp_path / "Addon1"
     addon_dir.mkdir()
@@ -52,3 +90,158 @@ def test_build_wheel_git_missing(
         "WHOOL_POST_VERSION_STRATEGY_OVERRIDE", POST_VERSION_STRATEGY_NONE
     )
     test_build_wheel_without_scm(tmp_path)
+
+
+def test_build_wheel_with_metadata_directory(
+    addon1_with_pyproject: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    metadata_directory = tmp_path / "metadata"
+    metadata_directory.mkdir()
+    wheel_directory = tmp_path / "wheel"
+    wheel_directory.mkdir()
+    with dir_changer(addon1_with_pyproject):
+        dist_info_dir = prepare_metadata_for_build_wheel(os.fspath(metadata_directory))
+        # metadata is not computed again when metadata_directory is provided
+        monkeypatch.setattr(buildapi, "_get_metadata", None)
+        wheel_name = build_wheel(
+            os.fspath(wheel_directory),
+            metadata_directory=os.fspath(metadata_directory / dist_info_dir),
+        )
+    assert wheel_name == "odoo_addon_addon1-15.0.1.1.0.1-py3-none-any.whl"
+    with ZipFile(wheel_directory / wheel_name) as zf:
+        assert (
+            zf.read(f"{dist_info_dir}/METADATA")
+            == (metadata_directory / dist_info_dir / "METADATA").read_bytes()
+        )
+
+
+def test_build_wheel_read_git_objects(
+    addon1_with_pyproject: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("WHOOL_READ_GIT_OBJECTS", "1")
+    monkeypatch.setenv("WHOOL_NO_CACHE", "1")
+    addon1_with_pyproject.joinpath("hook.py").write_text("# modified")
+    read_from_working_tree = []
+    orig_write_file = WheelWriter.write_file
+
+    def write_file(self: WheelWriter, arcname: str, path: Path) -> None:
+        read_from_working_tree.append(arcname)
+        orig_write_file(self, arcname, path)
+
+    monkeypatch.setattr(WheelWriter, "write_file", write_file)
+    with dir_changer(addon1_with_pyproject):
+        wheel_name = build_wheel(os.fspath(tmp_path))
+    assert read_from_working_tree == ["odoo/addons/Addon1/hook.py"]
+    with ZipFile(tmp_path / wheel_name) as zf:
+        assert zf.read("odoo/addons/Addon1/hook.py") == b"# modified"
+        assert zf.read("odoo/addons/Addon1/__manifest__.py") == (
+            addon1_with_pyproject.joinpath("__manifest__.py").read_bytes()
+        )
+
+
+def test_build_wheel_compression_options(
+    addon1_with_pyproject: Path, tmp_path: Path
+) -> None:
+    pyproject_toml = addon1_with_pyproject / "pyproject.toml"
+    pyproject_toml.write_text(
+        pyproject_toml.read_text()
+        + "\n[tool.whool]\n"
+        + "compression_level = 1\n"
+        + 'uncompressed_extensions = ["PY"]\n'
+    )
+    with dir_changer(addon1_with_pyproject):
+        wheel_name = build_wheel(os.fspath(tmp_path))
+    with ZipFile(tmp_path / wheel_name) as zf:
+        assert zf.getinfo("odoo/addons/Addon1/__init__.py").compress_type == (
+            ZIP_STORED
+        )
+
+
+def test_build_wheel_invalid_compression_level(
+    addon1_with_pyproject: Path, tmp_path: Path
+) -> None:
+    pyproject_toml = addon1_with_pyproject / "pyproject.toml"
+    pyproject_toml.write_text(
+        pyproject_toml.read_text() + '\n[tool.whool]\ncompression_level = "max"\n'
+    )
+    with dir_changer(addon1_with_pyproject):
+        with pytest.raises(WhoolException, match="compression_level"):
+            build_wheel(os.fspath(tmp_path))
+
+
+def test_build_wheel_from_sdist(
+    addon1_with_pyproject: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    sdist_name = buildapi._build_sdist(addon1_with_pyproject, tmp_path)
+    with TarFile.open(tmp_path / sdist_name) as tf:
+        tf.extractall(tmp_path)
+    sdist_dir = tmp_path / "odoo_addon_addon1-15.0.1.1.0.1"
+    monkeypatch.setattr(
+        manifestoo_core.metadata, "metadata_from_addon_dir", no_metadata_from_addon_dir
+    )
+    with dir_changer(sdist_dir):
+        wheel_name = build_wheel(os.fspath(tmp_path))
+    assert wheel_name == "odoo_addon_addon1-15.0.1.1.0.1-py3-none-any.whl"
+    with ZipFile(tmp_path / wheel_name) as zf:
+        names = zf.namelist()
+        assert "odoo/addons/Addon1/__manifest__.py" in names
+        assert "odoo/addons/Addon1/PKG-INFO" not in names
+        assert "odoo/addons/Addon1/pyproject.toml" not in names
+        metadata = zf.read("odoo_addon_addon1-15.0.1.1.0.1.dist-info/METADATA")
+    assert metadata == sdist_dir.joinpath("PKG-INFO").read_bytes()
+
+
+def test_build_wheel_include_exclude(
+    addon1_with_pyproject: Path, tmp_path: Path
+) -> None:
+    addon1_with_pyproject.joinpath("tests").mkdir()
+    addon1_with_pyproject.joinpath("tests", "test_a.py").touch()
+    addon1_with_pyproject.joinpath("a.js.map").touch()
+    pyproject_toml = addon1_with_pyproject / "pyproject.toml"
+    pyproject_toml.write_text(
+        pyproject_toml.read_text()
+        + "\n[tool.whool]\n"
+        + 'wheel_exclude = ["tests", "*.map"]\n'
+        + 'sdist_exclude = ["hook2.py"]\n'
+    )
+    subprocess.check_call(["git", "add", "."], cwd=addon1_with_pyproject)
+    wheel_name = buildapi._build_wheel(addon1_with_pyproject, tmp_path, editable=False)
+    with ZipFile(tmp_path / wheel_name) as zf:
+        assert [n for n in zf.namelist() if n.startswith("odoo/")] == [
+            "odoo/addons/Addon1/__init__.py",
+            "odoo/addons/Addon1/__manifest__.py",
+            "odoo/addons/Addon1/hook.py",
+            "odoo/addons/Addon1/hook2.py",
+        ]
+    sdist_name = buildapi._build_sdist(addon1_with_pyproject, tmp_path)
+    with TarFile.open(tmp_path / sdist_name) as tf:
+        assert sorted(n.split("/", 1)[1] for n in tf.getnames()) == [
+            "PKG-INFO",
+            "__init__.py",
+            "__manifest__.py",
+            "a.js.map",
+            "hook.py",
+            "pyproject.toml",
+            "tests/test_a.py",
+        ]
+    pyproject_toml.write_text(
+        pyproject_toml.read_text() + 'wheel_include = ["__*__.py", "hook.py"]\n'
+    )
+    wheel_name = buildapi._build_wheel(addon1_with_pyproject, tmp_path, editable=False)
+    with ZipFile(tmp_path / wheel_name) as zf:
+        assert [n for n in zf.namelist() if n.startswith("odoo/")] == [
+            "odoo/addons/Addon1/__init__.py",
+            "odoo/addons/Addon1/__manifest__.py",
+            "odoo/addons/Addon1/hook.py",
+        ]
+
+
+def test_build_wheel_invalid_exclude(
+    addon1_with_pyproject: Path, tmp_path: Path
+) -> None:
+    pyproject_toml = addon1_with_pyproject / "pyproject.toml"
+    pyproject_toml.write_text(
+        pyproject_toml.read_text() + '\n[tool.whool]\nwheel_exclude = "tests"\n'
+    )
+    with pytest.raises(WhoolException, match="wheel_exclude"):
+        buildapi._build_wheel(addon1_with_pyproject, tmp_path, editable=False)
@@ -16,6 +16,11 @@ def test_help(capsys: pytest.CaptureFixture[str]) -> None:
     (
         ["--help"],
         ["init", "--help"],
+        ["build", "--help"],
+        ["cache", "--help"],
+        ["metadata", "--help"],
+        ["stamp", "--help"],
+        ["serve", "--help"],
     ),
 )
 def test_help_sysexit(help_args: List[str], capsys: pytest.CaptureFixture[str]) -> None:
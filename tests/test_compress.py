@@ -0,0 +1,74 @@
+import gzip
+import io
+import os
+from pathlib import Path
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+import pytest
+
+from whool.compress import GZIP_BLOCK_SIZE, GzipWriter
+from whool.wheelfile import WheelWriter
+
+
+def _data(size: int) -> bytes:
+    # compressible, but not trivially
+    return b"".join(str(i).encode() for i in range(size))[:size]
+
+
+@pytest.mark.parametrize("size", [0, 10, GZIP_BLOCK_SIZE, 3 * GZIP_BLOCK_SIZE + 7])
+def test_gzip_writer(size: int) -> None:
+    data = _data(size)
+    outputs = []
+    for threads in (1, 4):
+        f = io.BytesIO()
+        with GzipWriter(f, threads=threads) as gz:
+            gz.write(data)
+        outputs.append(f.getvalue())
+    assert outputs[0] == outputs[1]
+    assert gzip.decompress(outputs[0]) == data
+
+
+def test_gzip_writer_ratio() -> None:
+    data = _data(4 * GZIP_BLOCK_SIZE)
+    f = io.BytesIO()
+    with GzipWriter(f, threads=4) as gz:
+        gz.write(data)
+    # priming each block with the previous one keeps the ratio of a single stream
+    assert len(f.getvalue()) <= len(gzip.compress(data)) * 1.01
+
+
+def test_gzip_writer_mtime(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    f = io.BytesIO()
+    with GzipWriter(f) as gz:
+        gz.write(b"x")
+    assert int.from_bytes(f.getvalue()[4:8], "little") == 1700000000
+
+
+def test_wheel_writer_threads(tmp_path: Path) -> None:
+    tmp_path.joinpath("big.js").write_bytes(_data(500_000))
+    tmp_path.joinpath("small.py").write_bytes(b"pass\n")
+    tmp_path.joinpath("img.png").write_bytes(os.urandom(100_000))
+    outputs = []
+    for threads in (1, 4):
+        f = io.BytesIO()
+        with WheelWriter(
+            f, "a-1.dist-info", uncompressed_extensions=[".png"], threads=threads
+        ) as wheel:
+            for name in ("big.js", "small.py", "img.png"):
+                wheel.write_file(name, tmp_path / name)
+            wheel.write_bytes("data.txt", _data(200_000))
+        outputs.append(f.getvalue())
+    assert outputs[0] == outputs[1]
+    with ZipFile(io.BytesIO(outputs[0])) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == [
+            "big.js",
+            "small.py",
+            "img.png",
+            "data.txt",
+            "a-1.dist-info/RECORD",
+        ]
+        assert zf.getinfo("big.js").compress_type == ZIP_DEFLATED
+        assert zf.getinfo("img.png").compress_type == ZIP_STORED
+        assert zf.read("data.txt") == _data(200_000)
@@ -0,0 +1,41 @@
+import subprocess
+import sys
+from typing import Dict
+
+# modules that the build backend must not import at startup, as they are only
+# needed to compute metadata from scratch or to write archives
+LAZY_MODULES = [
+    "concurrent.futures",
+    "importlib.metadata",
+    "manifestoo_core.addon",
+    "manifestoo_core.metadata",
+    "tarfile",
+    "tempfile",
+    "whool.compress",
+    "whool.wheelfile",
+    "zipfile",
+]
+
+
+def _import_times(module: str) -> Dict[str, int]:
+    """Return the cumulative import time in microseconds of the modules imported
+    by module, as reported by python -X importtime."""
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    import_times = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+def test_buildapi_lazy_imports() -> None:
+    import_times = _import_times("whool.buildapi")
+    assert "whool.buildapi" in import_times
+    assert [module for module in LAZY_MODULES if module in import_times] == []
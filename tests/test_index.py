@@ -0,0 +1,41 @@
+import hashlib
+from pathlib import Path
+from zipfile import ZipFile
+
+from whool.build import build
+from whool.index import write_index
+
+
+def test_build_index(addons_repo: Path, tmp_path: Path) -> None:
+    outdir = tmp_path / "dist"
+    build(addons_repo, outdir, index=True)
+    wheel_path = outdir / "odoo_addon_addon_a-16.0.1.0.0-py3-none-any.whl"
+    metadata = outdir.joinpath(wheel_path.name + ".metadata").read_bytes()
+    with ZipFile(wheel_path) as zf:
+        assert metadata == zf.read("odoo_addon_addon_a-16.0.1.0.0.dist-info/METADATA")
+    root_index = outdir.joinpath("simple", "index.html").read_text()
+    assert '<a href="odoo-addon-addon-a/">odoo-addon-addon-a</a>' in root_index
+    assert '<a href="odoo-addon-addon-b/">odoo-addon-addon-b</a>' in root_index
+    project_index = outdir.joinpath(
+        "simple", "odoo-addon-addon-a", "index.html"
+    ).read_text()
+    wheel_sha256 = hashlib.sha256(wheel_path.read_bytes()).hexdigest()
+    metadata_sha256 = hashlib.sha256(metadata).hexdigest()
+    assert f'href="../../{wheel_path.name}#sha256={wheel_sha256}"' in project_index
+    assert f'data-core-metadata="sha256={metadata_sha256}"' in project_index
+    assert f'data-dist-info-metadata="sha256={metadata_sha256}"' in project_index
+    assert 'data-requires-python="&gt;=3.10"' in project_index
+    assert "odoo_addon_addon_a-16.0.1.0.0.tar.gz</a>" in project_index
+
+
+def test_write_index_extracts_metadata(addons_repo: Path, tmp_path: Path) -> None:
+    outdir = tmp_path / "dist"
+    build(addons_repo / "addon_a", outdir, sdist=False)
+    metadata_path = outdir / "odoo_addon_addon_a-16.0.1.0.0-py3-none-any.whl.metadata"
+    assert not metadata_path.exists()
+    write_index(outdir)
+    assert metadata_path.read_bytes().startswith(b"Metadata-Version: ")
+    assert (
+        "data-core-metadata"
+        in outdir.joinpath("simple", "odoo-addon-addon-a", "index.html").read_text()
+    )
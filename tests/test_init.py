@@ -3,7 +3,7 @@ from pathlib import Path
 import pytest
 
 from whool.cli import main
-from whool.init import BUILD_SYSTEM_TOML, init, init_addon_dir
+from whool.init import BUILD_SYSTEM_TOML, init, init_addon_dir, init_paths
 
 from .utils import dir_changer
 
@@ -85,3 +85,67 @@ def test_init_cli_no_cwd(addon1: Path) -> None:
     assert not pyproject_toml_path.exists()
     assert main(["init", "--exit-non-zero-on-changes", str(addon1)]) == 1
     assert pyproject_toml_path.exists()
+
+
+def _make_addon(addon_dir: Path) -> None:
+    addon_dir.mkdir(parents=True)
+    (addon_dir / "__init__.py").touch()
+    (addon_dir / "__manifest__.py").write_text("{'name': 'x', 'version': '16.0.1.0.0'}")
+
+
+def test_init_max_depth(tmp_path: Path) -> None:
+    _make_addon(tmp_path / "addon_a")
+    _make_addon(tmp_path / "group" / "addon_b")
+    _make_addon(tmp_path / "group" / "sub" / "addon_c")
+    _make_addon(tmp_path / ".hidden" / "addon_d")
+    assert init(tmp_path) == [tmp_path / "addon_a"]
+    assert init(tmp_path, max_depth=3) == [
+        tmp_path / "group" / "addon_b",
+        tmp_path / "group" / "sub" / "addon_c",
+    ]
+
+
+def test_init_exclude(tmp_path: Path) -> None:
+    _make_addon(tmp_path / "group" / "addon_a")
+    _make_addon(tmp_path / "group" / "addon_b")
+    _make_addon(tmp_path / "vendor" / "addon_c")
+    assert init(tmp_path, max_depth=2, exclude=["vendor", "group/addon_b"]) == [
+        tmp_path / "group" / "addon_a"
+    ]
+
+
+def test_init_paths_files(tmp_path: Path) -> None:
+    _make_addon(tmp_path / "addon_a")
+    _make_addon(tmp_path / "addon_b")
+    (tmp_path / "addon_a" / "models").mkdir()
+    (tmp_path / "addon_a" / "models" / "m.py").touch()
+    (tmp_path / "README.md").touch()
+    assert init_paths(
+        [
+            tmp_path / "addon_a" / "models" / "m.py",
+            tmp_path / "addon_a" / "__init__.py",
+            tmp_path / "README.md",
+        ]
+    ) == [tmp_path / "addon_a"]
+    assert not (tmp_path / "addon_b" / "pyproject.toml").exists()
+
+
+def test_init_cli_files(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    _make_addon(tmp_path / "addon_a")
+    _make_addon(tmp_path / "addon_b")
+    with dir_changer(tmp_path):
+        assert (
+            main(
+                [
+                    "init",
+                    "--exit-non-zero-on-changes",
+                    "addon_a/__manifest__.py",
+                    "addon_b/__init__.py",
+                ]
+            )
+            == 1
+        )
+    captured = capsys.readouterr()
+    assert captured.err == (
+        "pyproject.toml was generated or modified in addon_a, addon_b\n"
+    )
@@ -0,0 +1,128 @@
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import manifestoo_core.metadata
+import pytest
+
+from whool.buildapi import _get_metadata
+from whool.cli import main
+
+from .utils import no_metadata_from_addon_dir
+
+
+def test_metadata_cli(addons_repo: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    addons_repo.joinpath("addon_b", "__manifest__.py").write_text(
+        "{'name': 'addon_b', 'version': '16.0.1.0.0', 'depends': ['addon_a', 'mail']}"
+    )
+    assert main(["metadata", str(addons_repo)]) == 0
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(m["name"], m["version"]) for m in lines] == [
+        ("odoo-addon-addon_a", "16.0.1.0.0"),
+        # uncommitted change
+        ("odoo-addon-addon_b", "16.0.1.0.0.1"),
+    ]
+    assert "odoo-addon-addon_a>=16.0dev,<16.1dev" in lines[1]["requires_dist"]
+    assert "odoo-addon-mail>=16.0dev,<16.1dev" not in lines[1]["requires_dist"]
+    assert "description" not in lines[0]
+
+
+def test_metadata_cli_no_post_version(
+    addons_repo: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    addons_repo.joinpath("addon_a", "__init__.py").write_text("# uncommitted")
+    assert main(["metadata", str(addons_repo / "addon_a")]) == 0
+    (line,) = capsys.readouterr().out.splitlines()
+    assert json.loads(line)["version"] == "16.0.1.0.0.1"
+    assert main(["metadata", "--no-post-version", str(addons_repo / "addon_a")]) == 0
+    (line,) = capsys.readouterr().out.splitlines()
+    assert json.loads(line)["version"] == "16.0.1.0.0"
+
+
+def test_metadata_cli_error(
+    addons_repo: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    addons_repo.joinpath("addon_a", "__manifest__.py").write_text(
+        "{'name': 'addon_a', 'version': '1.0'}"
+    )
+    assert main(["metadata", str(addons_repo)]) == 1
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["odoo-addon-addon_b"]
+
+
+def test_stamp(
+    addons_repo: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    index_path = tmp_path / "whool-metadata.json"
+    assert main(["stamp", "--output", str(index_path), str(addons_repo)]) == 0
+    assert sorted(json.loads(index_path.read_text())["addons"]) == [
+        "addon_a",
+        "addon_b",
+    ]
+    monkeypatch.setenv("WHOOL_NO_CACHE", "1")
+    monkeypatch.setenv("WHOOL_METADATA_INDEX", str(index_path))
+    expected = _get_metadata(addons_repo / "addon_a", use_index=False)
+    with monkeypatch.context() as m:
+        m.setattr(
+            manifestoo_core.metadata,
+            "metadata_from_addon_dir",
+            no_metadata_from_addon_dir,
+        )
+        assert _get_metadata(addons_repo / "addon_a").items() == expected.items()
+        # without the git history, as in a container image
+        copied_addon_a = tmp_path / "copy" / "addon_a"
+        shutil.copytree(addons_repo / "addon_a", copied_addon_a)
+        assert _get_metadata(copied_addon_a).items() == expected.items()
+    # the git HEAD changed
+    subprocess.check_call(
+        ["git", "commit", "--allow-empty", "-m", "empty"], cwd=addons_repo
+    )
+    with monkeypatch.context() as m:
+        m.setattr(
+            manifestoo_core.metadata,
+            "metadata_from_addon_dir",
+            no_metadata_from_addon_dir,
+        )
+        with pytest.raises(AssertionError):
+            _get_metadata(addons_repo / "addon_a")
+        # the manifest changed
+        copied_addon_a.joinpath("__manifest__.py").write_text(
+            "{'name': 'addon_a', 'version': '16.0.1.1.0'}"
+        )
+        with pytest.raises(AssertionError):
+            _get_metadata(copied_addon_a)
+
+
+def test_stamp_uncommitted(
+    addons_repo: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    index_path = tmp_path / "whool-metadata.json"
+    assert main(["stamp", "--output", str(index_path), str(addons_repo)]) == 0
+    monkeypatch.setenv("WHOOL_NO_CACHE", "1")
+    monkeypatch.setenv("WHOOL_METADATA_INDEX", str(index_path))
+    addons_repo.joinpath("addon_b", "__init__.py").write_text("# uncommitted")
+    assert _get_metadata(addons_repo / "addon_b")["Version"] == "16.0.1.0.0.1"
+    # stamped with the uncommitted change
+    assert main(["stamp", "--output", str(index_path), str(addons_repo)]) == 0
+    with monkeypatch.context() as m:
+        m.setattr(
+            manifestoo_core.metadata,
+            "metadata_from_addon_dir",
+            no_metadata_from_addon_dir,
+        )
+        assert _get_metadata(addons_repo / "addon_b")["Version"] == "16.0.1.0.0.1"
+
+
+def test_stamp_same_addon_name(
+    addons_repo: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    other_dir = tmp_path / "other"
+    shutil.copytree(addons_repo / "addon_a", other_dir / "addon_a")
+    index_path = tmp_path / "whool-metadata.json"
+    assert (
+        main(["stamp", "--output", str(index_path), str(addons_repo), str(other_dir)])
+        == 1
+    )
+    assert "have the same addon name" in capsys.readouterr().err
+    assert not index_path.exists()
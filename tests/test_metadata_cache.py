@@ -0,0 +1,69 @@
+import subprocess
+from pathlib import Path
+
+import manifestoo_core.metadata
+import pytest
+
+from whool.buildapi import _get_metadata, _serialize_metadata
+
+from .utils import no_metadata_from_addon_dir
+
+
+def test_metadata_cache(
+    addon1_with_pyproject: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    metadata = _get_metadata(addon1_with_pyproject)
+    assert metadata["Version"] == "15.0.1.1.0.1"
+    with monkeypatch.context() as m:
+        m.setattr(
+            manifestoo_core.metadata,
+            "metadata_from_addon_dir",
+            no_metadata_from_addon_dir,
+        )
+        cached_metadata = _get_metadata(addon1_with_pyproject)
+    assert _serialize_metadata(cached_metadata) == _serialize_metadata(metadata)
+
+
+def test_metadata_cache_invalidation(addon1_with_pyproject: Path) -> None:
+    assert _get_metadata(addon1_with_pyproject)["Version"] == "15.0.1.1.0.1"
+    # uncommitted change
+    addon1_with_pyproject.joinpath("hook2.py").write_text("# modified")
+    assert _get_metadata(addon1_with_pyproject)["Version"] == "15.0.1.1.0.2"
+    # new commit
+    subprocess.check_call(["git", "commit", "-am", "m"], cwd=addon1_with_pyproject)
+    assert _get_metadata(addon1_with_pyproject)["Version"] == "15.0.1.1.0.2"
+    # manifest change
+    addon1_with_pyproject.joinpath("__manifest__.py").write_text(
+        "{'name': 'addon1', 'version': '15.0.1.2.0', 'summary': 'A summary'}"
+    )
+    metadata = _get_metadata(addon1_with_pyproject)
+    assert metadata["Version"] == "15.0.1.2.0.dev1"
+    assert metadata["Summary"] == "A summary"
+    # environment variable
+    with pytest.MonkeyPatch.context() as m:
+        m.setenv("WHOOL_POST_VERSION_STRATEGY_OVERRIDE", "none")
+        assert _get_metadata(addon1_with_pyproject)["Version"] == "15.0.1.2.0"
+
+
+def test_metadata_cache_shallow_clone(
+    addon1_with_pyproject: Path, tmp_path: Path
+) -> None:
+    clone_dir = tmp_path / "clone"
+    subprocess.check_call(
+        ["git", "clone", "--depth", "1", addon1_with_pyproject.as_uri(), str(clone_dir)]
+    )
+    shallow_version = _get_metadata(clone_dir)["Version"]
+    subprocess.check_call(["git", "fetch", "--unshallow"], cwd=clone_dir)
+    assert _get_metadata(clone_dir)["Version"] == "15.0.1.1.0.1" != shallow_version
+
+
+def test_metadata_cache_disabled(
+    addon1_with_pyproject: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("WHOOL_NO_CACHE", "1")
+    _get_metadata(addon1_with_pyproject)
+    monkeypatch.setattr(
+        manifestoo_core.metadata, "metadata_from_addon_dir", no_metadata_from_addon_dir
+    )
+    with pytest.raises(AssertionError):
+        _get_metadata(addon1_with_pyproject)
@@ -0,0 +1,127 @@
+import contextlib
+import subprocess
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from whool import scm
+from whool.scm import GitObjectReader, git_blobs, git_ls_files, shared_git_index
+
+
+def test_git_ls_files(addons_repo: Path) -> None:
+    addons_repo.joinpath("addon_a", "données.xml").touch()
+    subprocess.check_call(["git", "add", "."], cwd=addons_repo)
+    files = git_ls_files(addons_repo / "addon_a")
+    assert sorted(files) == [
+        "__init__.py",
+        "__manifest__.py",
+        "données.xml",
+        "pyproject.toml",
+    ]
+    assert files["__init__.py"].mode == "100644"
+    assert len(files["__init__.py"].sha) == 40
+
+
+def test_git_ls_files_not_git(tmp_path: Path) -> None:
+    with pytest.raises(subprocess.CalledProcessError):
+        git_ls_files(tmp_path)
+
+
+def test_shared_git_index(addons_repo: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    expected = {
+        addon_name: git_ls_files(addons_repo / addon_name)
+        for addon_name in ("addon_a", "addon_b", "setup")
+    }
+    git_calls: List[List[str]] = []
+    orig_git = scm._git
+
+    def _git(args: List[str], cwd: Path) -> Any:
+        git_calls.append(args)
+        return orig_git(args, cwd)
+
+    monkeypatch.setattr(scm, "_git", _git)
+    with shared_git_index():
+        for addon_name in ("addon_a", "addon_b", "addon_a", "setup"):
+            assert git_ls_files(addons_repo / addon_name) == expected[addon_name]
+        # one git rev-parse --show-toplevel and one git ls-files
+        assert len(git_calls) == 2
+    git_calls.clear()
+    assert git_ls_files(addons_repo / "addon_a") == expected["addon_a"]
+    assert len(git_calls) == 1
+
+
+def test_shared_git_index_nested_repo(addons_repo: Path) -> None:
+    addons_repo.joinpath(".gitignore").write_text("inner/\n")
+    inner_dir = addons_repo / "inner"
+    addon_dir = inner_dir / "addon_i"
+    addon_dir.mkdir(parents=True)
+    addon_dir.joinpath("__init__.py").touch()
+    subprocess.check_call(["git", "init"], cwd=inner_dir)
+    subprocess.check_call(["git", "add", "."], cwd=inner_dir)
+    with shared_git_index():
+        assert list(git_ls_files(addons_repo / "addon_a")) != []
+        assert list(git_ls_files(addon_dir)) == ["__init__.py"]
+
+
+def test_git_object_reader(addons_repo: Path) -> None:
+    files = git_ls_files(addons_repo / "addon_a")
+    reader = GitObjectReader(addons_repo)
+    try:
+        assert (
+            reader.read(files["__manifest__.py"].sha)
+            == (addons_repo / "addon_a" / "__manifest__.py").read_bytes()
+        )
+        assert reader.read(files["__init__.py"].sha) == b""
+        with pytest.raises(KeyError):
+            reader.read("0" * 40)
+    finally:
+        reader.close()
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_git_blobs(addons_repo: Path, shared: bool) -> None:
+    addon_dir = addons_repo / "addon_a"
+    addon_dir.joinpath("__init__.py").write_text("# modified")
+    with contextlib.ExitStack() as stack:
+        if shared:
+            stack.enter_context(shared_git_index())
+        blobs = stack.enter_context(git_blobs(addon_dir))
+        assert blobs is not None
+        assert blobs.read("__manifest__.py") == (
+            0o100644,
+            addon_dir.joinpath("__manifest__.py").read_bytes(),
+        )
+        assert blobs.read("__init__.py") is None  # modified
+        assert blobs.read("untracked.py") is None
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_git_blobs_converted(addons_repo: Path, shared: bool) -> None:
+    # a toy filter, that stores files in upper case
+    subprocess.check_call(
+        ["git", "config", "filter.up.clean", "tr a-z A-Z"], cwd=addons_repo
+    )
+    subprocess.check_call(
+        ["git", "config", "filter.up.smudge", "tr A-Z a-z"], cwd=addons_repo
+    )
+    addons_repo.joinpath(".gitattributes").write_text(
+        "*.txt filter=up\n*.csv eol=crlf\n*.py -text\n"
+    )
+    addon_dir = addons_repo / "addon_a"
+    addon_dir.joinpath("a.txt").write_text("hello\n")
+    addon_dir.joinpath("a.csv").write_bytes(b"a,b\r\n")
+    subprocess.check_call(["git", "add", "."], cwd=addons_repo)
+    with contextlib.ExitStack() as stack:
+        if shared:
+            stack.enter_context(shared_git_index())
+        blobs = stack.enter_context(git_blobs(addon_dir))
+        assert blobs is not None
+        assert blobs.read("a.txt") is None
+        assert blobs.read("a.csv") is None
+        assert blobs.read("__init__.py") == (0o100644, b"")
+
+
+def test_git_blobs_not_git(tmp_path: Path) -> None:
+    with git_blobs(tmp_path) as blobs:
+        assert blobs is None
@@ -0,0 +1,122 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Iterator
+from zipfile import ZipFile
+
+import pytest
+
+import whool.version
+from whool import buildapi
+from whool.buildapi import build_wheel, prepare_metadata_for_build_wheel
+from whool.server import ServerError, call_server
+
+from .utils import dir_changer
+
+requires_unix_sockets = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="requires Unix domain sockets"
+)
+
+
+@pytest.fixture
+def server_socket(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    socket_path = tmp_path / "whool.sock"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "whool", "serve", "--socket", str(socket_path)],
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(100):
+            if socket_path.exists():
+                break
+            time.sleep(0.05)
+        else:
+            raise AssertionError("whool serve did not start")
+        monkeypatch.setenv("WHOOL_SERVER_SOCKET", str(socket_path))
+        yield socket_path
+    finally:
+        proc.send_signal(signal.SIGINT)
+        proc.wait()
+    assert not socket_path.exists()
+
+
+def _no_local_build(*args: Any, **kwargs: Any) -> str:
+    raise AssertionError("not expected to build in process")
+
+
+@requires_unix_sockets
+def test_server_build_wheel(
+    server_socket: Path,
+    addon1_with_pyproject: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(buildapi, "_build_wheel", _no_local_build)
+    monkeypatch.setattr(buildapi, "_get_metadata", _no_local_build)
+    with dir_changer(addon1_with_pyproject):
+        dist_info_dirname = prepare_metadata_for_build_wheel(os.fspath(tmp_path))
+        assert dist_info_dirname == "odoo_addon_addon1-15.0.1.1.0.1.dist-info"
+        # relative to the current directory of the client
+        Path("dist").mkdir()
+        wheel_name = build_wheel("dist")
+    with ZipFile(addon1_with_pyproject / "dist" / wheel_name) as zf:
+        assert "odoo/addons/Addon1/__manifest__.py" in zf.namelist()
+
+
+@requires_unix_sockets
+def test_server_index_refresh(
+    server_socket: Path, addon1_with_pyproject: Path, tmp_path: Path
+) -> None:
+    (tmp_path / "1").mkdir()
+    (tmp_path / "2").mkdir()
+    with dir_changer(addon1_with_pyproject):
+        wheel_name = build_wheel(os.fspath(tmp_path / "1"))
+        with ZipFile(tmp_path / "1" / wheel_name) as zf:
+            assert "odoo/addons/Addon1/new.py" not in zf.namelist()
+        addon1_with_pyproject.joinpath("new.py").write_text("# new")
+        subprocess.check_call(["git", "add", "new.py"])
+        wheel_name = build_wheel(os.fspath(tmp_path / "2"))
+        with ZipFile(tmp_path / "2" / wheel_name) as zf:
+            assert zf.read("odoo/addons/Addon1/new.py") == b"# new"
+
+
+@requires_unix_sockets
+def test_server_error(server_socket: Path, tmp_path: Path) -> None:
+    with dir_changer(tmp_path):
+        with pytest.raises(ServerError):
+            build_wheel(os.fspath(tmp_path))
+
+
+def test_server_unreachable(
+    addon1_with_pyproject: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("WHOOL_SERVER_SOCKET", str(tmp_path / "missing.sock"))
+    with dir_changer(addon1_with_pyproject):
+        assert build_wheel(os.fspath(tmp_path)).endswith(".whl")
+
+
+@requires_unix_sockets
+def test_server_version_mismatch(
+    server_socket: Path,
+    addon1_with_pyproject: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(whool.version, "version", "0.0")
+    with dir_changer(addon1_with_pyproject):
+        assert call_server("build_wheel", os.fspath(tmp_path)) is None
+        assert build_wheel(os.fspath(tmp_path)).endswith(".whl")
+
+
+def test_server_without_unix_sockets(
+    addon1_with_pyproject: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("WHOOL_SERVER_SOCKET", str(tmp_path / "whool.sock"))
+    monkeypatch.delattr(socket, "AF_UNIX", raising=False)
+    with dir_changer(addon1_with_pyproject):
+        assert call_server("build_wheel", os.fspath(tmp_path)) is None
+        assert build_wheel(os.fspath(tmp_path)).endswith(".whl")
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import pytest
+
+from whool.cli import main
+from whool.timing import collect_trace, read_trace, span
+
+
+def test_span_trace_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    trace_file = tmp_path / "trace.jsonl"
+    monkeypatch.setenv("WHOOL_TRACE_FILE", str(trace_file))
+    with span("phase1", addon="a") as attrs:
+        attrs["cached"] = True
+    with span("phase2"):
+        pass
+    records = read_trace(trace_file)
+    assert [r["name"] for r in records] == ["phase1", "phase2"]
+    assert records[0]["addon"] == "a"
+    assert records[0]["cached"] is True
+    assert records[0]["duration"] >= 0
+
+
+def test_span_no_trace_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("WHOOL_TRACE_FILE", raising=False)
+    with collect_trace() as records:
+        with span("phase1"):
+            pass
+    assert [r["name"] for r in records] == ["phase1"]
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_build_profile(
+    addons_repo: Path,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    monkeypatch: pytest.MonkeyPatch,
+    jobs: str,
+) -> None:
+    monkeypatch.delenv("WHOOL_TRACE_FILE", raising=False)
+    outdir = tmp_path / "dist"
+    assert (
+        main(["build", "--profile", "-j", jobs, "-o", str(outdir), str(addons_repo)])
+        == 0
+    )
+    err = capsys.readouterr().err
+    phases = {line.split()[0]: line.split()[1] for line in err.splitlines()[1:]}
+    assert phases["metadata"] == "2"
+    assert phases["pack_wheel"] == "2"
+    assert phases["pack_sdist"] == "2"
@@ -0,0 +1,121 @@
+import os
+import subprocess
+import time
+from pathlib import Path
+
+import pytest
+
+from whool import wheelfile
+from whool.buildapi import build_wheel
+from whool.cache import list_cache_entries, parse_size, prune_cache
+from whool.cli import main
+
+from .utils import dir_changer
+
+
+def _build_wheel(addon_dir: Path, wheel_dir: Path) -> Path:
+    wheel_dir.mkdir(exist_ok=True)
+    with dir_changer(addon_dir):
+        return wheel_dir / build_wheel(os.fspath(wheel_dir))
+
+
+def test_wheel_cache(
+    addon1_with_pyproject: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    wheel_path1 = _build_wheel(addon1_with_pyproject, tmp_path / "1")
+    with monkeypatch.context() as m:
+        m.setattr(wheelfile, "WheelWriter", None)
+        wheel_path2 = _build_wheel(addon1_with_pyproject, tmp_path / "2")
+    assert wheel_path1.read_bytes() == wheel_path2.read_bytes()
+    # without cache, the wheel is identical
+    monkeypatch.setenv("WHOOL_NO_CACHE", "1")
+    wheel_path3 = _build_wheel(addon1_with_pyproject, tmp_path / "3")
+    assert wheel_path1.read_bytes() == wheel_path3.read_bytes()
+
+
+def test_wheel_cache_modified_file(
+    addon1_with_pyproject: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    _build_wheel(addon1_with_pyproject, tmp_path / "1")
+    addon1_with_pyproject.joinpath("__init__.py").write_text("# modified")
+    _build_wheel(addon1_with_pyproject, tmp_path / "2")
+    assert [e.namespace for e in list_cache_entries()].count("wheels") == 1
+    # stage the change, it is now cacheable
+    subprocess.check_call(["git", "add", "."], cwd=addon1_with_pyproject)
+    wheel_path = _build_wheel(addon1_with_pyproject, tmp_path / "3")
+    assert [e.namespace for e in list_cache_entries()].count("wheels") == 2
+    assert wheel_path.name == "odoo_addon_addon1-15.0.1.1.0.1-py3-none-any.whl"
+
+
+def test_wheel_cache_source_date_epoch(
+    addon1_with_pyproject: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    wheel_path1 = _build_wheel(addon1_with_pyproject, tmp_path / "1")
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    wheel_path2 = _build_wheel(addon1_with_pyproject, tmp_path / "2")
+    assert wheel_path1.read_bytes() != wheel_path2.read_bytes()
+
+
+def test_prune_cache(addons_repo: Path, tmp_path: Path) -> None:
+    _build_wheel(addons_repo / "addon_a", tmp_path / "a")
+    time.sleep(0.01)
+    _build_wheel(addons_repo / "addon_b", tmp_path / "b")
+    entries = list_cache_entries()
+    assert len(entries) == 4  # 2 metadata, 2 wheels
+    evicted = prune_cache(sum(e.size for e in entries) - 1)
+    assert evicted == entries[:1]
+    assert prune_cache(0) == entries[1:]
+    assert list_cache_entries() == []
+
+
+def test_cache_max_size(
+    addons_repo: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("WHOOL_CACHE_MAX_SIZE", "1K")
+    _build_wheel(addons_repo / "addon_a", tmp_path / "a")
+    _build_wheel(addons_repo / "addon_b", tmp_path / "b")
+    assert sum(e.size for e in list_cache_entries()) <= 1024
+
+
+@pytest.mark.parametrize(
+    ("s", "size"), [("10", 10), ("2k", 2048), ("1M", 1024**2), ("3GiB", 3 * 1024**3)]
+)
+def test_parse_size(s: str, size: int) -> None:
+    assert parse_size(s) == size
+
+
+def test_cache_cli(
+    addon1: Path,
+    tmp_path: Path,
+    whool_cache_dir: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    _build_wheel(addon1, tmp_path / "dist")
+    assert main(["cache", "info"]) == 0
+    out = capsys.readouterr().out
+    assert f"Cache directory: {whool_cache_dir}\n" in out
+    assert "in 2 entries\n" in out
+    assert main(["cache", "list"]) == 0
+    out = capsys.readouterr().out
+    assert "odoo_addon_addon1-15.0.1.0.0.1-py3-none-any.whl\n" in out
+    assert main(["cache", "prune"]) == 0
+    assert capsys.readouterr().out == "Evicted 0 entries (0 B)\n"
+    assert main(["cache", "clear"]) == 0
+    assert capsys.readouterr().out.startswith("Removed 2 entries")
+    assert list_cache_entries() == []
+
+
+def test_cache_foreign_files(
+    addon1: Path, tmp_path: Path, whool_cache_dir: Path
+) -> None:
+    # the cache directory may be shared with other tools
+    whool_cache_dir.joinpath("pip", "http").mkdir(parents=True)
+    whool_cache_dir.joinpath("pip", "http", "x").write_text("x")
+    whool_cache_dir.joinpath("other").mkdir()
+    whool_cache_dir.joinpath("other", "y").write_text("y")
+    _build_wheel(addon1, tmp_path / "dist")
+    assert {e.namespace for e in list_cache_entries()} == {"metadata", "wheels"}
+    assert main(["cache", "clear"]) == 0
+    assert prune_cache(0) == []
+    assert whool_cache_dir.joinpath("pip", "http", "x").read_text() == "x"
+    assert whool_cache_dir.joinpath("other", "y").read_text() == "y"
@@ -1,7 +1,7 @@
 import os
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Iterator
+from typing import Any, Dict, Iterator, NoReturn
 
 
 @contextmanager
@@ -25,3 +25,9 @@ def env_changer(env: Dict[str, str]) -> Iterator[None]:
     finally:
         os.environ.clear()
         os.environ.update(old_env)
+
+
+def no_metadata_from_addon_dir(*args: Any, **kwargs: Any) -> NoReturn:
+    """A replacement for metadata_from_addon_dir, when metadata must not be
+    computed"""
+    raise AssertionError("metadata not expected to be computed")